@@ -1,10 +1,44 @@
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import select, update, delete
-from app.database.db import async_session_maker
+import hashlib
+from functools import partial
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Optional
+
+from sqlalchemy import select, update, delete, tuple_, func
+from sqlalchemy.dialects.sqlite import insert
+from app.api.cache import EntityCache
+from app.api.loader import get_loader
+from app.database.db import session_scope, read_engine, stream_session_maker
+from app.database.writer import after_commit, write_scope
 
 
 class BaseDAO:
     model = None
+    # Кэш сущностей (app.api.cache.EntityCache); None - без кэширования
+    cache: Optional[EntityCache] = None
+
+    @classmethod
+    def _cached(cls, filter_by: dict):
+        if cls.cache is None or len(filter_by) != 1:
+            return None
+        (field, value), = filter_by.items()
+        if field not in cls.cache.key_fields:
+            return None
+        return cls.cache.get(field, value)
+
+    @classmethod
+    def _remember(cls, session, instance) -> None:
+        # Через сессию писателя читаются ещё не зафиксированные изменения, их кэшировать нельзя
+        if cls.cache is not None and instance is not None and session.bind is read_engine:
+            # Объект из кэша разделяется между запросами и не должен быть привязан к сессии
+            session.expunge(instance)
+            cls.cache.put(instance)
+
+    @classmethod
+    def _forget(cls, id: int) -> None:
+        if cls.cache is not None:
+            cls.cache.discard(id)
+            # До фиксации другой запрос мог снова закэшировать прежнюю версию записи
+            after_commit(partial(cls.cache.discard, id))
 
     @classmethod
     async def find_one_or_none_by_id(cls, data_id: int):
@@ -17,10 +51,16 @@ class BaseDAO:
         Возвращает:
             Экземпляр модели или None, если ничего не найдено.
         """
-        async with async_session_maker() as session:
+        cached = cls._cached({'id': data_id})
+        if cached is not None:
+            return cached
+
+        async with session_scope() as session:
             query = select(cls.model).filter_by(id=data_id)
             result = await session.execute(query)
-            return result.scalar_one_or_none()
+            instance = result.scalar_one_or_none()
+            cls._remember(session, instance)
+            return instance
 
     @classmethod
     async def find_one_or_none(cls, **filter_by):
@@ -33,10 +73,16 @@ class BaseDAO:
         Возвращает:
             Экземпляр модели или None, если ничего не найдено.
         """
-        async with async_session_maker() as session:
+        cached = cls._cached(filter_by)
+        if cached is not None:
+            return cached
+
+        async with session_scope() as session:
             query = select(cls.model).filter_by(**filter_by)
             result = await session.execute(query)
-            return result.scalar_one_or_none()
+            instance = result.scalar_one_or_none()
+            cls._remember(session, instance)
+            return instance
 
     @classmethod
     async def find_all(cls, **filter_by):
@@ -49,11 +95,146 @@ class BaseDAO:
         Возвращает:
             Список экземпляров модели.
         """
-        async with async_session_maker() as session:
+        async with session_scope() as session:
             query = select(cls.model).filter_by(**filter_by)
             result = await session.execute(query)
             return result.scalars().all()
 
+    @classmethod
+    async def get_version(cls, **filter_by) -> str:
+        """
+        Асинхронно вычисляет метку версии набора записей без их загрузки.
+
+        Метка меняется при добавлении, удалении и изменении любой записи набора: новая
+        или изменённая запись получает версию больше всех прежних (см. app.database.db.Base.version).
+
+        Аргументы:
+            **filter_by: Критерии фильтрации в виде именованных параметров.
+
+        Возвращает:
+            Короткую шестнадцатеричную строку.
+        """
+        async with session_scope() as session:
+            query = (
+                select(
+                    func.count(),
+                    func.max(cls.model.id),
+                    func.max(cls.model.version)
+                )
+                .where(*(getattr(cls.model, key) == value for key, value in filter_by.items()))
+            )
+            result = await session.execute(query)
+            version = repr(tuple(result.one()))
+            return hashlib.blake2b(version.encode(), digest_size=8).hexdigest()
+
+    @classmethod
+    async def load_by(cls, key: str, value) -> list:
+        """
+        Асинхронно возвращает записи с указанным значением поля-ссылки на родителя.
+
+        Вызовы, сделанные одновременно (например, через asyncio.gather) в рамках
+        одного запроса, объединяются в один запрос WHERE key IN (...).
+
+        Аргументы:
+            key: Имя поля-ссылки на родителя (например, "event_id").
+            value: Значение этого поля.
+
+        Возвращает:
+            Список экземпляров модели.
+        """
+        return await get_loader(cls.model, key).load(value)
+
+    @classmethod
+    async def load_many_by(cls, key: str, values) -> list[list]:
+        """
+        Асинхронно возвращает записи для каждого из значений поля-ссылки одним запросом.
+
+        Аргументы:
+            key: Имя поля-ссылки на родителя.
+            values: Значения этого поля.
+
+        Возвращает:
+            Списки экземпляров модели в порядке значений.
+        """
+        return await get_loader(cls.model, key).load_many(values)
+
+    @classmethod
+    async def find_projection(cls, *columns: str, **filter_by) -> list[dict[str, Any]]:
+        """
+        Асинхронно возвращает только указанные поля записей, не создавая ORM-объекты.
+
+        Аргументы:
+            *columns: Имена возвращаемых полей модели.
+            **filter_by: Критерии фильтрации в виде именованных параметров.
+
+        Возвращает:
+            Список словарей {поле: значение}.
+        """
+        async with session_scope() as session:
+            query = (
+                select(*(getattr(cls.model, column) for column in columns))
+                .filter_by(**filter_by)
+            )
+            result = await session.execute(query)
+            return [dict(row) for row in result.mappings()]
+
+    @classmethod
+    async def find_page(cls, limit: int, after_id: Optional[int] = None, order_by: Optional[str] = None,
+                        after_value: Any = None, **filter_by):
+        """
+        Асинхронно возвращает страницу экземпляров модели (keyset-пагинация).
+
+        Аргументы:
+            limit: Максимальное количество записей на странице.
+            after_id: ID последней записи предыдущей страницы.
+            order_by: Поле сортировки; ID используется как второй ключ.
+            after_value: Значение поля order_by у последней записи предыдущей страницы.
+            **filter_by: Критерии фильтрации в виде именованных параметров.
+
+        Возвращает:
+            Список экземпляров модели, упорядоченный по (order_by, id).
+        """
+        async with session_scope() as session:
+            query = select(cls.model).filter_by(**filter_by)
+            if order_by is None:
+                if after_id is not None:
+                    query = query.where(cls.model.id > after_id)
+                query = query.order_by(cls.model.id)
+            else:
+                column = getattr(cls.model, order_by)
+                if after_id is not None:
+                    query = query.where(tuple_(column, cls.model.id) > tuple_(after_value, after_id))
+                query = query.order_by(column, cls.model.id)
+
+            result = await session.execute(query.limit(limit))
+            return result.scalars().all()
+
+    @classmethod
+    async def stream(cls, batch_size: int = 500, **filter_by) -> AsyncIterator[list]:
+        """
+        Асинхронно перебирает экземпляры модели пачками, не загружая выборку целиком.
+
+        Использует отдельное соединение чтения (не из пула) с серверным курсором, поэтому
+        не блокирует сессию единицы работы и пул чтения на время перебора.
+
+        Аргументы:
+            batch_size: Количество записей в одной пачке.
+            **filter_by: Критерии фильтрации в виде именованных параметров.
+
+        Возвращает:
+            Асинхронный итератор по спискам экземпляров модели.
+        """
+        async with stream_session_maker() as session:
+            query = (
+                select(cls.model)
+                .filter_by(**filter_by)
+                .order_by(cls.model.id)
+                .execution_options(yield_per=batch_size)
+            )
+            result = await session.stream(query)
+            async for partition in result.scalars().partitions():
+                yield partition
+
     @classmethod
     async def add(cls, **values):
         """
@@ -65,16 +246,81 @@ class BaseDAO:
         Возвращает:
             Созданный экземпляр модели.
         """
-        async with async_session_maker() as session:
+        async with write_scope() as session:
             new_instance = cls.model(**values)
             session.add(new_instance)
-            try:
-                await session.commit()
-                await session.refresh(new_instance)
-                return new_instance
-            except SQLAlchemyError as e:
-                await session.rollback()
-                raise e
+            # Серверные значения (id, created_at) приходят через INSERT ... RETURNING
+            await session.flush()
+            return new_instance
+
+    @classmethod
+    async def add_many(cls, rows: list[dict[str, Any]], *returning: str) -> list[dict[str, Any]]:
+        """
+        Асинхронно создает записи одним executemany-запросом.
+
+        Скомпилированный INSERT кэшируется, строки передаются параметрами; с returning
+        SQLAlchemy отправляет их многострочными INSERT ... VALUES (...), (...) RETURNING.
+
+        Аргументы:
+            rows: Значения полей записей; у всех записей одинаковый набор полей.
+            *returning: Поля, которые нужно вернуть для созданных записей (например, 'id').
+
+        Возвращает:
+            Список словарей {поле: значение} для созданных записей (пустой, если returning не задан).
+        """
+        if not rows:
+            return []
+
+        stmt = insert(cls.model)
+        async with write_scope() as session:
+            if not returning:
+                await session.execute(stmt, rows)
+                return []
+            result = await session.execute(
+                stmt.returning(*(getattr(cls.model, column) for column in returning)),
+                rows
+            )
+            return [dict(row) for row in result.mappings()]
+
+    @classmethod
+    async def upsert(cls, conflict_fields: tuple[str, ...], **values) -> tuple[Any, bool]:
+        """
+        Асинхронно создает экземпляр модели или обновляет существующий: INSERT ... ON CONFLICT
+        DO NOTHING RETURNING, а если запись уже есть - UPDATE ... RETURNING в той же транзакции.
+
+        Аргументы:
+            conflict_fields: Поля уникального ограничения, по которому ищется существующая запись.
+            **values: Значения полей; при конфликте обновляются все, кроме conflict_fields.
+
+        Возвращает:
+            Кортеж (экземпляр модели, True если запись создана).
+        """
+        stamp = datetime.now(timezone.utc).replace(tzinfo=None)
+        inserted = (
+            insert(cls.model)
+            .values(**values, created_at=stamp, updated_at=stamp)
+            .on_conflict_do_nothing(index_elements=list(conflict_fields))
+            .returning(cls.model)
+        )
+        changes = {field: value for field, value in values.items() if field not in conflict_fields}
+        updated = (
+            update(cls.model)
+            .where(*(getattr(cls.model, field) == values[field] for field in conflict_fields))
+            .values(**changes, updated_at=stamp)
+            .returning(cls.model)
+            .execution_options(populate_existing=True)
+        )
+
+        # Вставку видно по возвращённой строке, а не по сравнению меток времени; писатель один,
+        # так что между INSERT и UPDATE запись не может исчезнуть
+        async with write_scope() as session:
+            instance = (await session.execute(inserted)).scalar_one_or_none()
+            created = instance is not None
+            if not created:
+                instance = (await session.execute(updated)).scalar_one()
+
+        cls._forget(instance.id)
+        return instance, created
 
     @classmethod
     async def delete(cls, id: int):
@@ -87,17 +333,17 @@ class BaseDAO:
         Возвращает:
             True если удаление прошло успешно, False если запись не найдена.
         """
-        async with async_session_maker() as session:
-            async with session.begin():
-                result = await session.execute(delete(cls.model).where(cls.model.id == id))
-                if result.rowcount == 0:
-                    return False
-                try:
-                    await session.commit()
-                except SQLAlchemyError as e:
-                    await session.rollback()
-                    raise e
-                return True
+        async with write_scope() as session:
+            stmt = (
+                delete(cls.model)
+                .where(cls.model.id == id)
+                .returning(cls.model.id)
+            )
+            result = await session.execute(stmt)
+            deleted = result.scalar_one_or_none() is not None
+
+        cls._forget(id)
+        return deleted
 
     @classmethod
     async def update(cls, id: int, **values):
@@ -111,28 +357,16 @@ class BaseDAO:
         Возвращает:
             Обновленный экземпляр модели или None если запись не найдена.
         """
-        async with async_session_maker() as session:
-            async with session.begin():
-                # Проверяем существование записи
-                existing = await session.get(cls.model, id)
-                if not existing:
-                    return None
-
-                # Обновляем поля
-                stmt = (
-                    update(cls.model)
-                    .where(cls.model.id == id)
-                    .values(**values)
-                    .execution_options(synchronize_session="fetch")
-                )
-                try:
-                    await session.execute(stmt)
-
-                    # Обновляем объект в сессии
-                    await session.refresh(existing)
-                    await session.commit()
-                except SQLAlchemyError as e:
-                    await session.rollback()
-                    raise e
+        async with write_scope() as session:
+            # Проверка существования совмещена с обновлением: нет строки - нет результата
+            stmt = (
+                update(cls.model)
+                .where(cls.model.id == id)
+                .values(**values)
+                .returning(cls.model)
+            )
+            result = await session.execute(stmt)
+            updated = result.scalar_one_or_none()
 
-            return existing
+        cls._forget(id)
+        return updated
@@ -0,0 +1,75 @@
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class EntityCache:
+    """
+    Кэш небольших часто читаемых сущностей в памяти процесса.
+
+    Записи хранятся по первичному ключу с вытеснением давно не использованных (LRU)
+    и сроком жизни (TTL); уникальные поля (например, telegram_id) ведут на
+    первичный ключ через индекс. Изменения через BaseDAO сбрасывают запись.
+    """
+
+    def __init__(self, key_fields: tuple[str, ...] = ('id',), maxsize: int = 1024, ttl: float = 300.0):
+        self.key_fields = key_fields
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        self._index: dict[tuple[str, Any], Any] = {}
+
+    def get(self, field: str, value) -> Optional[Any]:
+        """Возвращает сущность по значению ключевого поля или None."""
+        entity_id = value if field == 'id' else self._index.get((field, value))
+        entry = self._entries.get(entity_id) if entity_id is not None else None
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, entity = entry
+        if expires_at < time.monotonic():
+            self.discard(entity_id)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(entity_id)
+        self.hits += 1
+        return entity
+
+    def put(self, entity) -> None:
+        """Кладёт сущность в кэш под всеми её ключевыми полями."""
+        self.discard(entity.id)
+        self._entries[entity.id] = (time.monotonic() + self.ttl, entity)
+        for field in self.key_fields:
+            if field != 'id':
+                self._index[(field, getattr(entity, field))] = entity.id
+
+        while len(self._entries) > self.maxsize:
+            oldest_id = next(iter(self._entries))
+            self.discard(oldest_id)
+            self.evictions += 1
+
+    def discard(self, entity_id) -> None:
+        """Удаляет сущность из кэша."""
+        entry = self._entries.pop(entity_id, None)
+        if entry is None:
+            return
+        for field in self.key_fields:
+            if field != 'id':
+                self._index.pop((field, getattr(entry[1], field)), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._index.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
@@ -1,23 +1,27 @@
 from datetime import datetime
-from typing import Any
+from typing import Any, AsyncIterator, Optional
 
-from sqlalchemy import select, delete
+from sqlalchemy import Select, select, delete, update, func
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import selectinload
 
 from app.api.base import BaseDAO
-from app.database.db import async_session_maker
+from app.api.cache import EntityCache
+from app.database.db import session_scope, stream_session_maker
+from app.database.writer import write_scope
 from app.database.models import User, Event, Contractor, ContractorCategory, Task, ChecklistItem, Checklist, \
-    EventChecklist, EventContractor, CompletedChecklistItem
+    EventChecklist, EventContractor, CompletedChecklistItem, ProcessedUpdate
 
 
 class UserDAO(BaseDAO):
     model = User
+    cache = EntityCache(key_fields=('id', 'telegram_id'), maxsize=4096, ttl=300)
 
     @classmethod
     async def find_one_with_events(cls, telegram_id: int):
         """Находит пользователя по telegram_id и сразу загружает связанные с ним события."""
-        async with async_session_maker() as session:
+        async with session_scope() as session:
             query = (
                 select(cls.model)
                 .where(cls.model.telegram_id == telegram_id)
@@ -33,26 +37,21 @@ class EventDAO(BaseDAO):
     @classmethod
     async def get_events_by_user(cls, owner_id: int):
         """Возвращает все мероприятия пользователя"""
-        async with async_session_maker() as session:
+        async with session_scope() as session:
             try:
                 query = (
-                    select(cls.model)
+                    select(
+                        cls.model.id,
+                        cls.model.title,
+                        cls.model.date,
+                        cls.model.location,
+                        cls.model.owner_id
+                    )
                     .where(cls.model.owner_id == owner_id)
                     .order_by(cls.model.date)
                 )
                 result = await session.execute(query)
-                events = result.scalars().all()
-
-                return [
-                    {
-                        "id": event.id,
-                        "title": event.title,
-                        "date": event.date,
-                        "location": event.location,
-                        "owner_id": event.owner_id
-                    }
-                    for event in events
-                ]
+                return [dict(row) for row in result.mappings()]
             except SQLAlchemyError as e:
                 print(f"Error fetching events for user {owner_id}: {e}")
                 return None
@@ -60,7 +59,7 @@ class EventDAO(BaseDAO):
     @classmethod
     async def get_event_with_details(cls, event_id: int):
         """Возвращает мероприятие со всеми связанными данными"""
-        async with async_session_maker() as session:
+        async with session_scope() as session:
             query = (
                 select(cls.model)
                 .where(cls.model.id == event_id)
@@ -75,16 +74,78 @@ class EventDAO(BaseDAO):
             return result.scalar_one_or_none()
 
     @classmethod
-    async def assign_contractor(cls, event_id: int, contractor_id: int, cost: str):
-        """Назначение подрядчика с указанием стоимости"""
-        async with async_session_maker() as session:
+    async def assign_contractor(cls, event_id: int, contractor_id: int, cost: Optional[int] = None, paid: int = 0):
+        """Назначение подрядчика с указанием стоимости и предоплаты (в копейках)"""
+        async with write_scope() as session:
             assignment = EventContractor(
                 event_id=event_id,
                 contractor_id=contractor_id,
-                cost=cost
+                cost=cost,
+                paid=paid
             )
             session.add(assignment)
-            await session.commit()
+
+
+class BudgetDAO(BaseDAO):
+    """Бюджет мероприятий: агрегаты по стоимости и предоплате подрядчиков (суммы в копейках)."""
+    model = EventContractor
+
+    @staticmethod
+    def _totals(lines: list[dict[str, Any]]) -> dict[str, int]:
+        total = sum(line["total"] for line in lines)
+        paid = sum(line["paid"] for line in lines)
+        return {"total": total, "paid": paid, "remaining": total - paid}
+
+    @classmethod
+    async def get_event_budget(cls, event_id: int) -> Optional[dict[str, Any]]:
+        """Возвращает бюджет мероприятия по категориям подрядчиков или None, если мероприятия нет"""
+        async with session_scope() as session:
+            # Внешние соединения от мероприятия: мероприятие без подрядчиков даёт одну пустую строку
+            query = (
+                select(
+                    ContractorCategory.title.label("category"),
+                    func.count(EventContractor.contractor_id).label("contractors"),
+                    func.coalesce(func.sum(EventContractor.cost), 0).label("total"),
+                    func.coalesce(func.sum(EventContractor.paid), 0).label("paid")
+                )
+                .select_from(Event)
+                .outerjoin(EventContractor, EventContractor.event_id == Event.id)
+                .outerjoin(Contractor, EventContractor.contractor_id == Contractor.id)
+                .outerjoin(ContractorCategory, Contractor.category_id == ContractorCategory.id)
+                .where(Event.id == event_id)
+                .group_by(ContractorCategory.id)
+                .order_by(ContractorCategory.title)
+            )
+            result = await session.execute(query)
+            rows = result.mappings().all()
+            if not rows:
+                return None
+
+            lines = [dict(row) for row in rows if row["contractors"]]
+            return {"event_id": event_id, **cls._totals(lines), "lines": lines}
+
+    @classmethod
+    async def get_owner_budget(cls, owner_id: int) -> dict[str, Any]:
+        """Возвращает бюджет всех мероприятий пользователя с разбивкой по мероприятиям"""
+        async with session_scope() as session:
+            query = (
+                select(
+                    Event.id.label("event_id"),
+                    Event.title,
+                    Event.date,
+                    func.count(EventContractor.contractor_id).label("contractors"),
+                    func.coalesce(func.sum(EventContractor.cost), 0).label("total"),
+                    func.coalesce(func.sum(EventContractor.paid), 0).label("paid")
+                )
+                .select_from(EventContractor)
+                .join(Event, EventContractor.event_id == Event.id)
+                .where(Event.owner_id == owner_id)
+                .group_by(Event.id)
+                .order_by(Event.date)
+            )
+            result = await session.execute(query)
+            lines = [dict(row) for row in result.mappings()]
+            return {"owner_id": owner_id, **cls._totals(lines), "events": lines}
 
 
 class ContractorDAO(BaseDAO):
@@ -93,7 +154,7 @@ class ContractorDAO(BaseDAO):
     @classmethod
     async def get_categories_by_user(cls, owner_id: int) -> list[dict[str, Any]]:
         """Возвращает уникальные категории подрядчиков пользователя"""
-        async with async_session_maker() as session:
+        async with session_scope() as session:
             query = (
                 select(ContractorCategory.id, ContractorCategory.title)
                 .where(ContractorCategory.owner_id == owner_id)
@@ -110,26 +171,22 @@ class ContractorDAO(BaseDAO):
     @classmethod
     async def get_contractors_by_user(cls, owner_id: int):
         """Возвращает подрядчиков пользователя с категориями"""
-        async with async_session_maker() as session:
+        async with session_scope() as session:
             try:
                 query = (
-                    select(cls.model, ContractorCategory.title)
+                    select(
+                        cls.model.id,
+                        cls.model.name,
+                        ContractorCategory.title.label("category"),
+                        cls.model.contact,
+                        cls.model.owner_id
+                    )
                     .join(ContractorCategory, cls.model.category_id == ContractorCategory.id)
                     .where(cls.model.owner_id == owner_id)
                     .order_by(cls.model.name)
                 )
                 result = await session.execute(query)
-
-                return [
-                    {
-                        "id": contractor.id,
-                        "name": contractor.name,
-                        "category": category_title,
-                        "contact": contractor.contact,
-                        "owner_id": contractor.owner_id
-                    }
-                    for contractor, category_title in result.all()
-                ]
+                return [dict(row) for row in result.mappings()]
             except SQLAlchemyError as e:
                 print(f"Error fetching contractors for user {owner_id}: {e}")
                 return None
@@ -137,27 +194,26 @@ class ContractorDAO(BaseDAO):
     @classmethod
     async def get_contractors_for_event(cls, event_id: int):
         """Возвращает подрядчиков для конкретного мероприятия"""
-        async with async_session_maker() as session:
+        async with session_scope() as session:
             query = (
-                select(EventContractor, Contractor)
+                select(
+                    Contractor.id,
+                    Contractor.name,
+                    Contractor.contact,
+                    EventContractor.cost,
+                    EventContractor.paid
+                )
+                .select_from(EventContractor)
                 .join(Contractor, EventContractor.contractor_id == Contractor.id)
                 .where(EventContractor.event_id == event_id)
             )
             result = await session.execute(query)
-
-            return [
-                {
-                    "id": contractor.id,
-                    "name": contractor.name,
-                    "contact": contractor.contact,
-                    "cost": event_contractor.cost
-                }
-                for event_contractor, contractor in result.all()
-            ]
+            return [dict(row) for row in result.mappings()]
 
 
 class ContractorCategoryDAO(BaseDAO):
     model = ContractorCategory
+    cache = EntityCache(key_fields=('id',), maxsize=4096, ttl=300)
 
 
 class ChecklistDAO(BaseDAO):
@@ -166,28 +222,25 @@ class ChecklistDAO(BaseDAO):
     @classmethod
     async def get_checklists_for_event(cls, event_id: int):
         """Возвращает чек-листы для мероприятия со статусом выполнения"""
-        async with async_session_maker() as session:
+        async with session_scope() as session:
             query = (
-                select(EventChecklist, Checklist)
+                select(
+                    Checklist.id,
+                    Checklist.title,
+                    EventChecklist.is_completed,
+                    EventChecklist.completed_at
+                )
+                .select_from(EventChecklist)
                 .join(Checklist, EventChecklist.checklist_id == Checklist.id)
                 .where(EventChecklist.event_id == event_id)
             )
             result = await session.execute(query)
-
-            return [
-                {
-                    "id": checklist.id,
-                    "title": checklist.title,
-                    "is_completed": event_checklist.is_completed,
-                    "completed_at": event_checklist.completed_at
-                }
-                for event_checklist, checklist in result.all()
-            ]
+            return [dict(row) for row in result.mappings()]
 
     @classmethod
     async def create_template(cls, owner_id: int, title: str, items: list[str]):
         """Создание шаблона чек-листа с пунктами"""
-        async with async_session_maker() as session:
+        async with write_scope() as session:
             checklist = await cls.add(
                 owner_id=owner_id,
                 title=title,
@@ -204,24 +257,22 @@ class ChecklistDAO(BaseDAO):
                 ]
                 session.add_all(items_instances)
 
-            await session.commit()
             return checklist
 
     @classmethod
     async def assign_to_event(cls, checklist_id: int, event_id: int):
         """Привязка чек-листа к мероприятию"""
-        async with async_session_maker() as session:
+        async with write_scope() as session:
             assignment = EventChecklist(
                 event_id=event_id,
                 checklist_id=checklist_id
             )
             session.add(assignment)
-            await session.commit()
 
     @classmethod
     async def mark_item_completed(cls, event_id: int, item_id: int, user_id: int):
         """Отметка пункта как выполненного"""
-        async with async_session_maker() as session:
+        async with write_scope() as session:
             # Проверяем существование записи
             query = (
                 select(CompletedChecklistItem)
@@ -245,7 +296,27 @@ class ChecklistDAO(BaseDAO):
                 )
                 session.add(new_completion)
 
-            await session.commit()
+    @classmethod
+    async def update_with_items(cls, checklist_id: int, items: Optional[list[dict[str, Any]]] = None, **values):
+        """
+        Обновляет чек-лист и синхронизирует его пункты в одной транзакции.
+
+        Аргументы:
+            checklist_id: ID чек-листа.
+            items: Новый список пунктов (см. ChecklistItemDAO.sync); None - пункты не меняются.
+            **values: Поля чек-листа для обновления.
+
+        Возвращает:
+            Обновленный чек-лист или None, если он не найден.
+        """
+        async with write_scope() as session:
+            if values:
+                checklist = await cls.update(id=checklist_id, **values)
+            else:
+                checklist = await session.get(Checklist, checklist_id)
+            if checklist is not None and items is not None:
+                await ChecklistItemDAO.sync(checklist_id, items)
+            return checklist
 
 
 class TaskDAO(BaseDAO):
@@ -254,23 +325,19 @@ class TaskDAO(BaseDAO):
     @classmethod
     async def get_tasks_for_event(cls, event_id: int):
         """Возвращает задачи для мероприятия"""
-        async with async_session_maker() as session:
+        async with session_scope() as session:
             query = (
-                select(cls.model)
+                select(
+                    cls.model.id,
+                    cls.model.title,
+                    cls.model.date,
+                    cls.model.status
+                )
                 .where(cls.model.event_id == event_id)
                 .order_by(cls.model.date)
             )
             result = await session.execute(query)
-
-            return [
-                {
-                    "id": task.id,
-                    "title": task.title,
-                    "date": task.date,
-                    "status": task.status
-                }
-                for task in result.scalars()
-            ]
+            return [dict(row) for row in result.mappings()]
 
 
 class ChecklistItemDAO(BaseDAO):
@@ -279,33 +346,188 @@ class ChecklistItemDAO(BaseDAO):
     @classmethod
     async def get_completed_items_for_event(cls, event_id: int):
         """Возвращает выполненные пункты для мероприятия"""
-        async with async_session_maker() as session:
+        async with session_scope() as session:
             query = (
-                select(CompletedChecklistItem, ChecklistItem)
+                select(
+                    ChecklistItem.id,
+                    ChecklistItem.title,
+                    CompletedChecklistItem.is_completed,
+                    CompletedChecklistItem.completed_at
+                )
+                .select_from(CompletedChecklistItem)
                 .join(ChecklistItem, CompletedChecklistItem.item_id == ChecklistItem.id)
                 .where(CompletedChecklistItem.event_id == event_id)
             )
             result = await session.execute(query)
-
-            return [
-                {
-                    "id": item.id,
-                    "title": item.title,
-                    "is_completed": completed_item.is_completed,
-                    "completed_at": completed_item.completed_at
-                }
-                for completed_item, item in result.all()
-            ]
+            return [dict(row) for row in result.mappings()]
 
     @classmethod
     async def delete_all_for_checklist(cls, checklist_id: int) -> int:
         """Удаляет все пункты чек-листа (без удаления отметок о выполнении)"""
-        async with async_session_maker() as session:
+        async with write_scope() as session:
             delete_stmt = (
                 delete(EventChecklist)
                 .where(EventChecklist.checklist_id == checklist_id)
             )
             result = await session.execute(delete_stmt)
-            await session.commit()
 
             return result.rowcount
+
+    @classmethod
+    async def sync(cls, checklist_id: int, items: list[dict[str, Any]]) -> dict[str, int]:
+        """
+        Приводит пункты чек-листа к переданному списку, меняя только то, что изменилось.
+
+        Пункт с id сопоставляется с сохраненным по id, пункт без id - с сохраненным пунктом
+        с тем же текстом. Сопоставленные пункты сохраняют id и отметки о выполнении,
+        у них обновляется только изменившийся текст. Новые пункты вставляются,
+        несопоставленные сохраненные удаляются вместе с их отметками.
+        Каждый вид изменений выполняется одним запросом (executemany).
+
+        Аргументы:
+            checklist_id: ID чек-листа.
+            items: Пункты вида {"id": ..., "title": ...}; вместо title допускается text.
+
+        Возвращает:
+            Количество вставленных, обновленных и удаленных пунктов.
+        """
+        async with write_scope() as session:
+            result = await session.execute(
+                select(ChecklistItem.id, ChecklistItem.title)
+                .where(ChecklistItem.checklist_id == checklist_id)
+            )
+            stored = dict(result.tuples().all())
+
+            matched: set[int] = set()
+            unmatched = []
+            updates = []
+            for item in items:
+                title = item.get('title', item.get('text'))
+                item_id = item.get('id')
+                if item_id in stored and item_id not in matched:
+                    matched.add(item_id)
+                    if stored[item_id] != title:
+                        updates.append({'id': item_id, 'title': title})
+                else:
+                    unmatched.append(title)
+
+            # Пункты без id (или с чужим id) сопоставляются по тексту с оставшимися сохраненными
+            by_title: dict[str, list[int]] = {}
+            for item_id, title in stored.items():
+                if item_id not in matched:
+                    by_title.setdefault(title, []).append(item_id)
+            inserts = []
+            for title in unmatched:
+                same = by_title.get(title)
+                if same:
+                    matched.add(same.pop(0))
+                else:
+                    inserts.append({'checklist_id': checklist_id, 'title': title})
+            deleted = [item_id for item_id in stored if item_id not in matched]
+
+            if deleted:
+                # Внешние ключи SQLite не включены, поэтому отметки удаляются явно, а не каскадом
+                await session.execute(
+                    delete(CompletedChecklistItem).where(CompletedChecklistItem.item_id.in_(deleted))
+                )
+                await session.execute(delete(ChecklistItem).where(ChecklistItem.id.in_(deleted)))
+            if updates:
+                await session.execute(update(ChecklistItem), updates)
+            if inserts:
+                await session.execute(insert(ChecklistItem), inserts)
+
+        return {'inserted': len(inserts), 'updated': len(updates), 'deleted': len(deleted)}
+
+
+class ProcessedUpdateDAO(BaseDAO):
+    model = ProcessedUpdate
+
+    @classmethod
+    async def claim(cls, update_id: int, window: int) -> bool:
+        """Отмечает апдейт принятым; False, если его уже принял другой процесс. Хранит последние window апдейтов"""
+        async with write_scope() as session:
+            stmt = (
+                insert(cls.model)
+                .values(update_id=update_id)
+                .on_conflict_do_nothing()
+                .returning(cls.model.update_id)
+            )
+            result = await session.execute(stmt)
+            claimed = result.scalar_one_or_none() is not None
+            if claimed:
+                await session.execute(delete(cls.model).where(cls.model.update_id <= update_id - window))
+            return claimed
+
+    @classmethod
+    async def release(cls, update_id: int) -> None:
+        """Снимает отметку, чтобы повторная доставка апдейта была обработана"""
+        async with write_scope() as session:
+            await session.execute(delete(cls.model).where(cls.model.update_id == update_id))
+
+
+class ExportDAO:
+    """Построчная выгрузка данных пользователя (app.api.exporter)."""
+
+    KINDS = ('events', 'contractors', 'tasks', 'budget')
+
+    @staticmethod
+    def _query(kind: str, owner_id: int) -> Select:
+        if kind == 'events':
+            return (
+                select(Event.id, Event.title, Event.date, Event.location)
+                .where(Event.owner_id == owner_id)
+                .order_by(Event.date, Event.id)
+            )
+        if kind == 'contractors':
+            return (
+                select(Contractor.id, Contractor.name, ContractorCategory.title, Contractor.contact)
+                .join(ContractorCategory, Contractor.category_id == ContractorCategory.id)
+                .where(Contractor.owner_id == owner_id)
+                .order_by(ContractorCategory.title, Contractor.name, Contractor.id)
+            )
+        if kind == 'tasks':
+            return (
+                select(Task.id, Event.title, Task.title, Task.date, Task.status)
+                .join(Event, Task.event_id == Event.id)
+                .where(Event.owner_id == owner_id)
+                .order_by(Event.date, Event.id, Task.date, Task.id)
+            )
+        if kind == 'budget':
+            return (
+                select(
+                    Event.title,
+                    Event.date,
+                    ContractorCategory.title,
+                    Contractor.name,
+                    EventContractor.cost,
+                    EventContractor.paid
+                )
+                .select_from(EventContractor)
+                .join(Event, EventContractor.event_id == Event.id)
+                .join(Contractor, EventContractor.contractor_id == Contractor.id)
+                .join(ContractorCategory, Contractor.category_id == ContractorCategory.id)
+                .where(Event.owner_id == owner_id)
+                .order_by(Event.date, Event.id, ContractorCategory.title, Contractor.name)
+            )
+        raise ValueError(f"Неизвестный вид выгрузки: {kind}")
+
+    @classmethod
+    async def stream(cls, kind: str, owner_id: int, batch_size: int = 500) -> AsyncIterator[list[tuple]]:
+        """
+        Асинхронно перебирает строки выгрузки пачками, не загружая выборку целиком.
+
+        Как и BaseDAO.stream, использует отдельное соединение чтения с серверным курсором.
+
+        Аргументы:
+            kind: Вид выгрузки: events, contractors, tasks или budget (суммы в копейках).
+            owner_id: ID пользователя.
+            batch_size: Количество строк в одной пачке.
+
+        Возвращает:
+            Асинхронный итератор по спискам кортежей значений.
+        """
+        query = cls._query(kind, owner_id).execution_options(yield_per=batch_size)
+        async with stream_session_maker() as session:
+            result = await session.stream(query)
+            async for partition in result.partitions():
+                yield [tuple(row) for row in partition]
@@ -0,0 +1,241 @@
+"""
+Потоковая выгрузка данных пользователя в CSV/XLSX.
+
+Строки читаются из БД пачками (ExportDAO.stream) и сразу кодируются в файл,
+который отдаётся клиенту по частям: память не растёт с числом строк.
+XLSX пишется в zip-архив без перемотки, строки хранятся прямо в ячейках
+(inlineStr), без общей таблицы строк; сжатие выполняется в пуле потоков.
+Заголовки столбцов совпадают с теми, что понимает импорт (app.api.importer).
+"""
+import asyncio
+import csv
+import io
+import re
+import zipfile
+from datetime import date
+from decimal import Decimal
+from typing import Any, AsyncIterator, Iterable
+from xml.sax.saxutils import escape
+
+from app.api.dao import ExportDAO
+
+FORMATS = ('csv', 'xlsx')
+MEDIA_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+BATCH_SIZE = 1000
+
+HEADERS = {
+    'events': ('ID', 'Название', 'Дата', 'Место'),
+    'contractors': ('ID', 'Название', 'Категория', 'Контакты'),
+    'tasks': ('ID', 'Мероприятие', 'Задача', 'Дата', 'Выполнена'),
+    'budget': ('Мероприятие', 'Дата', 'Категория', 'Подрядчик', 'Стоимость', 'Предоплата'),
+}
+# Суммы хранятся в копейках, в файл попадают рубли
+MONEY_COLUMNS = {'budget': (4, 5)}
+EXCEL_EPOCH = date(1899, 12, 30)
+# Символы, недопустимые в XML 1.0
+XML_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+# С этих символов табличный редактор начинает формулу
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+# Стили ячеек: 0 - обычная, 1 - дата (встроенный формат 14)
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '</styleSheet>'
+)
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_END = '</sheetData></worksheet>'
+
+
+def _column_letter(index: int) -> str:
+    """Буквенное обозначение столбца по номеру с нуля: 0 - A, 26 - AA."""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _neutralize(value: Any) -> Any:
+    """Текст, похожий на формулу, экранируется апострофом, чтобы редактор показал его как есть."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _money(rows: list[tuple], columns: tuple[int, ...]) -> list[tuple]:
+    return [
+        tuple(
+            Decimal(value).scaleb(-2) if index in columns and value is not None else value
+            for index, value in enumerate(row)
+        )
+        for row in rows
+    ]
+
+
+class _Chunks:
+    """Приёмник для zipfile без перемотки: накапливает записанные байты до выдачи клиенту."""
+
+    def __init__(self):
+        self._parts: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts.clear()
+        return data
+
+
+class XlsxStreamWriter:
+    """
+    Пишет лист XLSX по частям.
+
+    Каждый вызов возвращает очередной фрагмент файла; фрагменты нужно отдать по порядку.
+    В памяти держится только текущая пачка строк и буфер сжатия.
+    """
+
+    def __init__(self, sheet_name: str):
+        self._output = _Chunks()
+        self._archive = zipfile.ZipFile(self._output, 'w', compression=zipfile.ZIP_DEFLATED)
+        self._row = 0
+        for name, content in (
+            ('[Content_Types].xml', _CONTENT_TYPES),
+            ('_rels/.rels', _ROOT_RELS),
+            ('xl/workbook.xml', _WORKBOOK.format(name=escape(sheet_name, {'"': '&quot;'}))),
+            ('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS),
+            ('xl/styles.xml', _STYLES),
+        ):
+            self._archive.writestr(name, content)
+        # Размер листа заранее неизвестен: zip64 разрешается сразу
+        self._sheet = self._archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True)
+        self._sheet.write(_SHEET_START.encode())
+
+    @staticmethod
+    def _cell(reference: str, value: Any) -> str:
+        if value is None:
+            return ''
+        if isinstance(value, bool):
+            return f'<c r="{reference}" t="b"><v>{int(value)}</v></c>'
+        if isinstance(value, (int, float, Decimal)):
+            return f'<c r="{reference}"><v>{value}</v></c>'
+        if isinstance(value, date):
+            return f'<c r="{reference}" s="1"><v>{(value - EXCEL_EPOCH).days}</v></c>'
+        text = escape(_neutralize(XML_INVALID.sub('', str(value))))
+        return f'<c r="{reference}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+    def write_rows(self, rows: Iterable[tuple]) -> bytes:
+        parts = []
+        for row in rows:
+            self._row += 1
+            cells = ''.join(
+                self._cell(f'{_column_letter(index)}{self._row}', value) for index, value in enumerate(row)
+            )
+            parts.append(f'<row r="{self._row}">{cells}</row>')
+        self._sheet.write(''.join(parts).encode())
+        return self._output.take()
+
+    def close(self) -> bytes:
+        self._sheet.write(_SHEET_END.encode())
+        self._sheet.close()
+        self._archive.close()
+        return self._output.take()
+
+
+def _csv_chunk(rows: Iterable[tuple]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(tuple(_neutralize(value) for value in row) for row in rows)
+    return buffer.getvalue().encode('utf-8')
+
+
+async def export_rows(kind: str, owner_id: int, file_format: str,
+                      batch_size: int = BATCH_SIZE) -> AsyncIterator[bytes]:
+    """
+    Выдаёт файл выгрузки kind в формате file_format частями, по одной на пачку строк из БД.
+
+    Исключения:
+        ValueError: неизвестный вид выгрузки или формат.
+    """
+    if kind not in HEADERS:
+        raise ValueError(f"Неизвестный вид выгрузки: {kind}")
+    if file_format not in FORMATS:
+        raise ValueError(f"Неизвестный формат файла: {file_format}")
+
+    money = MONEY_COLUMNS.get(kind)
+    batches = ExportDAO.stream(kind, owner_id, batch_size)
+
+    if file_format == 'csv':
+        # BOM нужен Excel, чтобы распознать UTF-8
+        yield '\ufeff'.encode('utf-8') + _csv_chunk([HEADERS[kind]])
+        async for rows in batches:
+            yield _csv_chunk(_money(rows, money) if money else rows)
+        return
+
+    loop = asyncio.get_running_loop()
+    writer = XlsxStreamWriter(kind)
+    yield writer.write_rows([HEADERS[kind]])
+    async for rows in batches:
+        if money:
+            rows = _money(rows, money)
+        chunk = await loop.run_in_executor(None, writer.write_rows, rows)
+        if chunk:
+            yield chunk
+    yield await loop.run_in_executor(None, writer.close)
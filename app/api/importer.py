@@ -0,0 +1,302 @@
+"""
+Импорт подрядчиков и мероприятий пользователя из CSV/XLSX.
+
+Файл читается построчно и записывается пачками по CHUNK_SIZE строк: одна пачка -
+одна транзакция с многострочными INSERT. Категории подрядчиков находятся или
+создаются по ходу чтения, дубликаты (уже сохранённые записи и повторы внутри
+файла) отбрасываются по набору ключей в памяти, без запросов на каждую строку.
+
+Запуск из корня репозитория:
+    python -m app.api.importer contractors contractors.csv --owner-id 1
+"""
+import argparse
+import asyncio
+import csv
+import io
+import itertools
+import zipfile
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, BinaryIO, Callable, Iterator, Optional
+
+from app.api.dao import ContractorDAO, ContractorCategoryDAO, EventDAO
+from app.api.exporter import FORMULA_PREFIXES
+from app.database.writer import write_queue
+from app.utils.xlsx import XlsxRowReader
+
+CHUNK_SIZE = 500
+MAX_ERRORS = 20
+FORMATS = ('csv', 'xlsx')
+# Дата в XLSX хранится числом дней от 30.12.1899
+EXCEL_EPOCH = date(1899, 12, 30)
+DATE_FORMATS = ('%Y-%m-%d', '%d.%m.%Y', '%d.%m.%y')
+
+
+@dataclass
+class ImportStats:
+    """Итоги импорта; обновляются после каждой пачки."""
+    rows: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    categories_created: int = 0
+    errors: list[str] = field(default_factory=list)
+
+    def error(self, line: int, message: str) -> None:
+        self.invalid += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"Строка {line}: {message}")
+
+
+def iter_rows(file: BinaryIO, file_format: str) -> Iterator[list]:
+    """Построчно выдаёт значения ячеек файла; первая строка - заголовок."""
+    if file_format == 'csv':
+        text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+        # Excel в русской локали сохраняет CSV с разделителем «;»
+        header = text.readline()
+        delimiter = ';' if header.count(';') > header.count(',') else ','
+        yield from csv.reader(itertools.chain([header], text), delimiter=delimiter)
+        return
+
+    with zipfile.ZipFile(file) as archive:
+        for row in XlsxRowReader(archive):
+            yield [row.get(index) for index in range(max(row, default=-1) + 1)]
+
+
+def _text(value: Any, name: str, max_length: int, required: bool = True) -> Optional[str]:
+    value = str(value).strip() if value is not None else ''
+    # Выгрузка (app.api.exporter) экранирует похожий на формулу текст апострофом
+    if value.startswith("'") and value[1:].startswith(FORMULA_PREFIXES):
+        value = value[1:].strip()
+    if not value:
+        if required:
+            raise ValueError(f"не заполнено поле «{name}»")
+        return None
+    if len(value) > max_length:
+        raise ValueError(f"поле «{name}» длиннее {max_length} символов")
+    return value
+
+
+def _date(value: Any) -> date:
+    value = str(value).strip() if value is not None else ''
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            pass
+    try:
+        return EXCEL_EPOCH + timedelta(days=int(float(value)))
+    except (ValueError, OverflowError):
+        raise ValueError(f"не удалось разобрать дату «{value}»")
+
+
+class _ContractorImporter:
+    # Поле -> допустимые заголовки столбца (без учёта регистра)
+    columns = {
+        'name': ('name', 'наименование', 'название', 'подрядчик'),
+        'category': ('category', 'категория'),
+        'contact': ('contact', 'контакт', 'контакты'),
+    }
+    required = ('name', 'category')
+
+    def __init__(self, owner_id: int):
+        self.owner_id = owner_id
+        self.categories: dict[str, int] = {}
+        self.keys: set[tuple] = set()
+
+    async def prepare(self) -> None:
+        categories = await ContractorCategoryDAO.find_projection('id', 'title', owner_id=self.owner_id)
+        self.categories = {row['title']: row['id'] for row in categories}
+        contractors = await ContractorDAO.find_projection('category_id', 'name', 'contact', owner_id=self.owner_id)
+        self.keys = {(row['category_id'], row['name'], row['contact']) for row in contractors}
+
+    @staticmethod
+    def convert(values: dict[str, Any]) -> dict[str, Any]:
+        return {
+            'name': _text(values.get('name'), 'name', 100),
+            'category': _text(values.get('category'), 'category', 100),
+            'contact': _text(values.get('contact'), 'contact', 200, required=False) or ''
+        }
+
+    async def write(self, records: list[dict[str, Any]], stats: ImportStats) -> None:
+        async with write_queue.transaction():
+            missing = list(dict.fromkeys(
+                record['category'] for record in records if record['category'] not in self.categories
+            ))
+            created = await ContractorCategoryDAO.add_many(
+                [{'owner_id': self.owner_id, 'title': title} for title in missing],
+                'id', 'title'
+            )
+            self.categories.update((row['title'], row['id']) for row in created)
+            stats.categories_created += len(created)
+
+            rows = []
+            for record in records:
+                key = (self.categories[record['category']], record['name'], record['contact'])
+                if key in self.keys:
+                    stats.duplicates += 1
+                    continue
+                self.keys.add(key)
+                rows.append({'owner_id': self.owner_id, 'category_id': key[0], 'name': key[1], 'contact': key[2]})
+            await ContractorDAO.add_many(rows)
+        stats.inserted += len(rows)
+
+
+class _EventImporter:
+    columns = {
+        'title': ('title', 'название', 'мероприятие'),
+        'date': ('date', 'дата'),
+        'location': ('location', 'место', 'место проведения'),
+    }
+    required = ('title', 'date')
+
+    def __init__(self, owner_id: int):
+        self.owner_id = owner_id
+        self.keys: set[tuple] = set()
+
+    async def prepare(self) -> None:
+        events = await EventDAO.find_projection('title', 'date', owner_id=self.owner_id)
+        self.keys = {(row['title'], row['date']) for row in events}
+
+    @staticmethod
+    def convert(values: dict[str, Any]) -> dict[str, Any]:
+        return {
+            'title': _text(values.get('title'), 'title', 200),
+            'date': _date(values.get('date')),
+            'location': _text(values.get('location'), 'location', 200, required=False)
+        }
+
+    async def write(self, records: list[dict[str, Any]], stats: ImportStats) -> None:
+        rows = []
+        for record in records:
+            key = (record['title'], record['date'])
+            if key in self.keys:
+                stats.duplicates += 1
+                continue
+            self.keys.add(key)
+            rows.append({'owner_id': self.owner_id, **record})
+        async with write_queue.transaction():
+            await EventDAO.add_many(rows)
+        stats.inserted += len(rows)
+
+
+IMPORTERS = {
+    'contractors': _ContractorImporter,
+    'events': _EventImporter,
+}
+
+
+def _header_indexes(importer, header: list) -> dict[str, int]:
+    names = [str(name).strip().casefold() if name is not None else '' for name in header]
+    indexes = {}
+    for name, aliases in importer.columns.items():
+        index = next((names.index(alias) for alias in aliases if alias in names), None)
+        if index is not None:
+            indexes[name] = index
+    missing = [name for name in importer.required if name not in indexes]
+    if missing:
+        raise ValueError(f"В файле нет столбцов: {', '.join(missing)}")
+    return indexes
+
+
+def _take(rows: Iterator[list], size: int) -> list[list]:
+    return list(itertools.islice(rows, size))
+
+
+async def import_file(kind: str, file: BinaryIO, file_format: str, owner_id: int,
+                      chunk_size: int = CHUNK_SIZE,
+                      progress: Optional[Callable[[ImportStats], None]] = None) -> ImportStats:
+    """
+    Импортирует записи вида kind ('contractors' или 'events') из файла CSV/XLSX.
+
+    Файл разбирается пачками в пуле потоков, чтобы не занимать цикл событий.
+    Каждая пачка записывается отдельной транзакцией, даже внутри единицы работы
+    (app.database.db.unit_of_work): при ошибке записи уже сохранённые пачки остаются в БД.
+
+    Аргументы:
+        kind: Что импортируется.
+        file: Открытый на чтение двоичный файл.
+        file_format: 'csv' или 'xlsx'.
+        owner_id: ID пользователя, которому принадлежат записи.
+        chunk_size: Количество строк в пачке.
+        progress: Вызывается с текущими итогами после каждой пачки.
+
+    Возвращает:
+        Итоги импорта.
+
+    Исключения:
+        ValueError: неизвестный вид записей или формат, пустой файл, нет обязательных столбцов.
+    """
+    if kind not in IMPORTERS:
+        raise ValueError(f"Неизвестный вид записей: {kind}")
+    if file_format not in FORMATS:
+        raise ValueError(f"Неизвестный формат файла: {file_format}")
+
+    importer = IMPORTERS[kind](owner_id)
+    await importer.prepare()
+
+    loop = asyncio.get_running_loop()
+    rows = iter_rows(file, file_format)
+    try:
+        header = await loop.run_in_executor(None, next, rows, None)
+    except (zipfile.BadZipFile, UnicodeDecodeError, KeyError):
+        raise ValueError(f"Файл не похож на {file_format.upper()}")
+    if header is None:
+        raise ValueError("Файл пуст")
+    indexes = _header_indexes(importer, header)
+
+    stats = ImportStats()
+    line = 1
+    while chunk := await loop.run_in_executor(None, _take, rows, chunk_size):
+        records = []
+        for row in chunk:
+            line += 1
+            values = {name: row[index] if index < len(row) else None for name, index in indexes.items()}
+            if all(value is None or str(value).strip() == '' for value in values.values()):
+                continue
+            stats.rows += 1
+            try:
+                records.append(importer.convert(values))
+            except ValueError as e:
+                stats.error(line, str(e))
+        await importer.write(records, stats)
+        if progress is not None:
+            progress(stats)
+    return stats
+
+
+def _print_progress(stats: ImportStats) -> None:
+    print(f"\rстрок: {stats.rows}, добавлено: {stats.inserted}, дубликатов: {stats.duplicates}, "
+          f"с ошибками: {stats.invalid}", end='', flush=True)
+
+
+async def _main(args: argparse.Namespace) -> ImportStats:
+    file_format = args.format or args.path.rsplit('.', 1)[-1].lower()
+    try:
+        with open(args.path, 'rb') as file:
+            return await import_file(args.kind, file, file_format, args.owner_id, args.chunk_size,
+                                     progress=_print_progress)
+    finally:
+        await write_queue.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('kind', choices=sorted(IMPORTERS), help='что импортировать')
+    parser.add_argument('path', help='путь к файлу CSV или XLSX')
+    parser.add_argument('--owner-id', type=int, required=True, help='ID пользователя (users.id)')
+    parser.add_argument('--format', choices=FORMATS, help='формат файла; по умолчанию - по расширению')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='строк в одной транзакции')
+    args = parser.parse_args()
+
+    stats = asyncio.run(_main(args))
+    print()
+    for key, value in asdict(stats).items():
+        if key != 'errors':
+            print(f"{key}: {value}")
+    for error in stats.errors:
+        print(error)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, Iterable
+
+from sqlalchemy import select, inspect
+
+from app.database.db import session_scope, current_unit_of_work
+
+# Запас до лимита SQLite на число параметров в одном запросе
+IN_CHUNK_SIZE = 900
+
+
+class RelationLoader:
+    """
+    Загрузчик дочерних записей по ключу родителя.
+
+    Все вызовы load(), сделанные до ближайшего переключения цикла событий,
+    собираются и выполняются одним запросом WHERE key IN (...).
+    Результаты кэшируются на время жизни загрузчика.
+    """
+
+    def __init__(self, model, key: str):
+        self.model = model
+        self.key = key
+        self._cache: dict[Any, list] = {}
+        self._pending: dict[Any, asyncio.Future] = {}
+
+    async def load(self, value) -> list:
+        """Возвращает дочерние записи для одного значения ключа."""
+        if value in self._cache:
+            return self._cache[value]
+
+        future = self._pending.get(value)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not self._pending:
+                loop.call_soon(self._schedule_dispatch)
+            future = self._pending[value] = loop.create_future()
+        return await future
+
+    async def load_many(self, values: Iterable) -> list[list]:
+        """Возвращает дочерние записи для каждого значения ключа, одним запросом."""
+        return list(await asyncio.gather(*(self.load(value) for value in values)))
+
+    def _schedule_dispatch(self) -> None:
+        asyncio.ensure_future(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        pending, self._pending = self._pending, {}
+        values = list(pending)
+        column = getattr(self.model, self.key)
+        grouped = defaultdict(list)
+        try:
+            async with session_scope() as session:
+                for start in range(0, len(values), IN_CHUNK_SIZE):
+                    chunk = values[start:start + IN_CHUNK_SIZE]
+                    query = (
+                        select(self.model)
+                        .where(column.in_(chunk))
+                        .order_by(*inspect(self.model).primary_key)
+                    )
+                    result = await session.execute(query)
+                    for row in result.scalars():
+                        grouped[getattr(row, self.key)].append(row)
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for value, future in pending.items():
+            self._cache[value] = grouped[value]
+            if not future.done():
+                future.set_result(grouped[value])
+
+
+def get_loader(model, key: str) -> RelationLoader:
+    """
+    Возвращает загрузчик для текущей единицы работы, чтобы запросы всех
+    обработчиков одного запроса попадали в общие пачки. Вне единицы работы
+    создаётся новый загрузчик.
+    """
+    uow = current_unit_of_work()
+    if uow is None:
+        return RelationLoader(model, key)
+
+    loader = uow.loaders.get((model, key))
+    if loader is None:
+        loader = uow.loaders[(model, key)] = RelationLoader(model, key)
+    return loader
@@ -1,30 +1,90 @@
+import asyncio
+import json
 import logging
-from datetime import datetime
-from typing import Optional
-
-from fastapi import APIRouter, HTTPException, Request, Query
-from fastapi.responses import JSONResponse
+import tempfile
+from datetime import datetime, date
+from typing import Any, Literal, Optional
+from urllib.parse import urlencode
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.routing import APIRoute
 from pydantic import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
+from starlette.routing import Match
 
 from app.api.dao import (
     EventDAO,
+    BudgetDAO,
     ContractorDAO,
     ContractorCategoryDAO,
     ChecklistItemDAO,
     ChecklistDAO
 )
+from app.api.exporter import MEDIA_TYPES, export_rows
+from app.api.importer import import_file
+from app.api.schemas import BatchData, BatchItem
+from app.database.db import get_unit_of_work
+
+router = APIRouter(prefix='/api', tags=['API'], dependencies=[Depends(get_unit_of_work)])
+
+MAX_PAGE_SIZE = 500
+MAX_IMPORT_SIZE = 50 * 1024 * 1024
+# Загружаемый файл держится в памяти до этого размера, больший сбрасывается во временный файл
+IMPORT_SPOOL_SIZE = 1024 * 1024
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": "xlsx",
+}
+
+
+async def not_modified(request: Request, response: Response, dao, **filter_by) -> Optional[Response]:
+    """Set the collection ETag; return a ready 304 response if the client already has this version"""
+    etag = f'W/"{await dao.get_version(**filter_by)}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
 
-router = APIRouter(prefix='/api', tags=['API'])
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # Слабое сравнение: префикс W/ не учитывается
+        client_tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in client_tags or etag.removeprefix("W/") in client_tags:
+            return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
 
 
 # ========== Events Endpoints ==========
 @router.get("/events", response_class=JSONResponse)
-async def get_events(owner_id: int):
-    """Get all events for specified owner"""
+async def get_events(
+        request: Request,
+        response: Response,
+        owner_id: int,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+        after_id: Optional[int] = Query(None),
+        after_date: Optional[date] = Query(None)
+):
+    """Get events for specified owner, optionally one page after (after_date, after_id)"""
+    if (after_id is None) != (after_date is None):
+        raise HTTPException(status_code=400, detail="after_id and after_date must be passed together")
+
     try:
-        events = await EventDAO.find_all(owner_id=owner_id)
-        return events
+        cached = await not_modified(request, response, EventDAO, owner_id=owner_id)
+        if cached:
+            return cached
+
+        if limit is None:
+            return await EventDAO.find_all(owner_id=owner_id)
+
+        return await EventDAO.find_page(
+            limit,
+            after_id=after_id,
+            order_by='date',
+            after_value=after_date,
+            owner_id=owner_id
+        )
     except SQLAlchemyError as e:
         logging.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error")
@@ -47,6 +107,8 @@ async def create_event(request: Request):
         await EventDAO.add(**data)
         return {"status": "success", "message": "Event created successfully"}
 
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"DB Error on adding event: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -58,15 +120,11 @@ async def update_event(event_id: int, request: Request):
     try:
         data = await request.json()
 
-        existing_event = await EventDAO.find_one_or_none(id=event_id)
-        if not existing_event:
-            raise HTTPException(status_code=404, detail="Event not found")
-
         data["date"] = datetime.strptime(data["date"], '%Y-%m-%d').date()
         updated_event = await EventDAO.update(id=event_id, **data)
 
         if not updated_event:
-            raise HTTPException(status_code=500, detail="Failed to update event")
+            raise HTTPException(status_code=404, detail="Event not found")
 
         return {
             "status": "success",
@@ -76,6 +134,8 @@ async def update_event(event_id: int, request: Request):
 
     except ValidationError as ve:
         raise HTTPException(status_code=422, detail=ve.errors())
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"DB Error on updating event: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -85,38 +145,60 @@ async def update_event(event_id: int, request: Request):
 async def delete_event(event_id: int):
     """Delete event by ID"""
     try:
-        existing_event = await EventDAO.find_one_or_none(id=event_id)
-        if not existing_event:
-            raise HTTPException(status_code=404, detail="Event not found")
-
         success = await EventDAO.delete(id=event_id)
         if not success:
-            raise HTTPException(status_code=500, detail="Failed to delete event")
+            raise HTTPException(status_code=404, detail="Event not found")
 
         return {
             "status": "success",
             "message": "Event deleted successfully",
             "event_id": event_id
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"DB Error on deleting event: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.get("/events/{event_id}/budget", response_class=JSONResponse)
+async def get_event_budget(event_id: int):
+    """Get event budget totals by contractor category, amounts in minor units"""
+    try:
+        budget = await BudgetDAO.get_event_budget(event_id)
+    except SQLAlchemyError as e:
+        logging.error(f"Database error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+    if budget is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return budget
+
+
 # ========== Contractors Endpoints ==========
 @router.get("/contractors", response_class=JSONResponse)
 async def get_contractors(
+        request: Request,
+        response: Response,
         owner_id: int,
-        category: Optional[int] = Query(None)
+        category: Optional[int] = Query(None),
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+        after_id: Optional[int] = Query(None)
 ):
-    """Get all contractors with optional category filter"""
+    """Get contractors with optional category filter, optionally one page after after_id"""
     try:
         filters = {'owner_id': owner_id}
         if category is not None:
             filters['category_id'] = category
 
-        contractors = await ContractorDAO.find_all(**filters)
-        return contractors
+        cached = await not_modified(request, response, ContractorDAO, **filters)
+        if cached:
+            return cached
+
+        if limit is None:
+            return await ContractorDAO.find_all(**filters)
+
+        return await ContractorDAO.find_page(limit, after_id=after_id, **filters)
     except SQLAlchemyError as e:
         logging.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error")
@@ -142,6 +224,8 @@ async def create_contractor(request: Request):
             owner_id=data['owner_id']
         )
         return contractor
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"DB Error on adding contractor: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -153,10 +237,6 @@ async def update_contractor(contractor_id: int, request: Request):
     try:
         data = await request.json()
 
-        existing = await ContractorDAO.find_one_or_none(id=contractor_id)
-        if not existing:
-            raise HTTPException(status_code=404, detail="Contractor not found")
-
         if 'category_id' in data:
             category = await ContractorCategoryDAO.find_one_or_none(
                 id=data['category_id']
@@ -166,10 +246,7 @@ async def update_contractor(contractor_id: int, request: Request):
 
         updated = await ContractorDAO.update(id=contractor_id, **data)
         if not updated:
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to update contractor"
-            )
+            raise HTTPException(status_code=404, detail="Contractor not found")
 
         return {
             "status": "success",
@@ -185,16 +262,9 @@ async def update_contractor(contractor_id: int, request: Request):
 async def delete_contractor(contractor_id: int):
     """Delete contractor by ID"""
     try:
-        existing = await ContractorDAO.find_one_or_none(id=contractor_id)
-        if not existing:
-            raise HTTPException(status_code=404, detail="Contractor not found")
-
         success = await ContractorDAO.delete(id=contractor_id)
         if not success:
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to delete contractor"
-            )
+            raise HTTPException(status_code=404, detail="Contractor not found")
 
         return {
             "status": "success",
@@ -231,11 +301,23 @@ async def create_category(request: Request):
 
 
 @router.get("/contractor-categories", response_class=JSONResponse)
-async def get_categories(owner_id: int):
-    """Get all contractor categories for specified owner"""
+async def get_categories(
+        request: Request,
+        response: Response,
+        owner_id: int,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+        after_id: Optional[int] = Query(None)
+):
+    """Get contractor categories for specified owner, optionally one page after after_id"""
     try:
-        categories = await ContractorCategoryDAO.find_all(owner_id=owner_id)
-        return categories
+        cached = await not_modified(request, response, ContractorCategoryDAO, owner_id=owner_id)
+        if cached:
+            return cached
+
+        if limit is None:
+            return await ContractorCategoryDAO.find_all(owner_id=owner_id)
+
+        return await ContractorCategoryDAO.find_page(limit, after_id=after_id, owner_id=owner_id)
     except SQLAlchemyError as e:
         logging.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error")
@@ -245,13 +327,9 @@ async def get_categories(owner_id: int):
 async def delete_category(category_id: int):
     """Delete contractor category by ID"""
     try:
-        existing = await ContractorCategoryDAO.find_one_or_none(id=category_id)
-        if not existing:
-            raise HTTPException(status_code=404, detail="Category not found")
-
         success = await ContractorCategoryDAO.delete(id=category_id)
         if not success:
-            raise HTTPException(status_code=500, detail="Failed to delete category")
+            raise HTTPException(status_code=404, detail="Category not found")
 
         return {
             "status": "success",
@@ -263,18 +341,160 @@ async def delete_category(category_id: int):
         raise HTTPException(status_code=500, detail="Database error")
 
 
+# ========== Import Endpoints ==========
+@router.post("/import/{kind}", response_class=JSONResponse)
+async def import_records(
+        request: Request,
+        kind: Literal["contractors", "events"],
+        owner_id: int,
+        format: Optional[Literal["csv", "xlsx"]] = Query(None)
+):
+    """Import contractors or events from a CSV/XLSX file sent as the request body"""
+    file_format = format or IMPORT_CONTENT_TYPES.get(request.headers.get("content-type", "").split(";")[0].strip())
+    if file_format is None:
+        raise HTTPException(status_code=400, detail="Pass format=csv|xlsx or a CSV/XLSX Content-Type")
+
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_SIZE) as file:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > MAX_IMPORT_SIZE:
+                raise HTTPException(status_code=413, detail="File is too large")
+            file.write(chunk)
+        file.seek(0)
+
+        try:
+            stats = await import_file(kind, file, file_format, owner_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except SQLAlchemyError as e:
+            logging.error(f"DB Error on importing {kind}: {e}")
+            raise HTTPException(status_code=500, detail="Database error")
+
+    logging.info(f"Imported {kind} for owner {owner_id}: {stats}")
+    return stats
+
+
+# ========== Export Endpoints ==========
+@router.get("/export/{kind}", response_class=StreamingResponse)
+async def export_records(
+        kind: Literal["events", "contractors", "tasks", "budget"],
+        owner_id: int,
+        format: Literal["csv", "xlsx"] = Query("csv")
+):
+    """Stream owner's events, contractors, tasks or contractor costs as a CSV/XLSX file"""
+    return StreamingResponse(
+        export_rows(kind, owner_id, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{format}"'}
+    )
+
+
+# ========== Batch Endpoint ==========
+@router.post("/batch", response_class=JSONResponse)
+async def batch(request: Request, data: BatchData):
+    """Run several GET requests to this API in one round-trip, sharing one unit of work"""
+    # Подзапросы присоединяются к единице работы этого запроса: одна сессия и общие загрузчики.
+    # Выполняются по очереди, так как сессия единицы работы всё равно используется поочерёдно
+    responses = [await _run_batch_item(request, item) for item in data.requests]
+    return {"responses": responses}
+
+
+def _batchable(scope: dict[str, Any]) -> bool:
+    """Подзапрос можно выполнить в пакете, только если он попадает в метод API с ответом в JSON."""
+    for route in router.routes:
+        if isinstance(route, APIRoute) and route.matches(scope)[0] == Match.FULL:
+            response_class = route.response_class
+            if isinstance(response_class, DefaultPlaceholder):
+                response_class = response_class.value
+            return issubclass(response_class, JSONResponse)
+    return False
+
+
+async def _run_batch_item(request: Request, item: BatchItem) -> dict[str, Any]:
+    """Выполняет подзапрос внутри приложения и возвращает его статус, ETag и тело."""
+    path = item.path.split("?", 1)[0]
+    try:
+        headers = [(name.lower().encode("latin-1"), value.encode("latin-1"))
+                   for name, value in item.headers.items()]
+    except UnicodeEncodeError:
+        return {"status": 400, "body": {"detail": "Header names and values must be latin-1"}}
+
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": request.scope.get("http_version", "1.1"),
+        "method": "GET",
+        "scheme": request.scope.get("scheme", "http"),
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": request.scope.get("root_path", ""),
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(item.params, doseq=True).encode(),
+        "headers": headers,
+        "state": request.scope.get("state", {}),
+    }
+    # Потоковые ответы (выгрузки) и страницы в пакет не попадают: их тело не JSON
+    if item.method.upper() != "GET" or not path.startswith(f"{router.prefix}/") or not _batchable(scope):
+        return {"status": 400, "body": {"detail": "Only GET requests to JSON API methods can be batched"}}
+
+    result: dict[str, Any] = {}
+    chunks: list[bytes] = []
+    request_sent = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Как и настоящий сервер, отключение сообщается только после завершения ответа;
+        # иначе ожидающий его код (listen_for_disconnect) крутился бы в цикле
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+            headers = {name.decode("latin-1").lower(): value.decode("latin-1")
+                       for name, value in message.get("headers", [])}
+            if "etag" in headers:
+                result["etag"] = headers["etag"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception as e:
+        logging.error(f"Error in batch request {path}: {e}")
+        return {"status": 500, "body": {"detail": "Internal server error"}}
+    finally:
+        finished.set()
+
+    body = b"".join(chunks)
+    try:
+        result["body"] = json.loads(body) if body else None
+    except ValueError:
+        result["body"] = body.decode("utf-8", "replace")
+    return result
+
+
 # ========== Checklists Endpoints ==========
 @router.get("", response_class=JSONResponse)
 async def get_checklists(owner_id: int):
     """Get all checklists for specified owner with items"""
     try:
         checklists = await ChecklistDAO.find_all(owner_id=owner_id)
+        items = await ChecklistItemDAO.load_many_by(
+            'checklist_id',
+            [checklist.id for checklist in checklists]
+        )
 
-        for checklist in checklists:
-            items = await ChecklistItemDAO.find_all(checklist_id=checklist["id"])
-            checklist["items"] = items
-
-        return checklists
+        return [
+            {**jsonable_encoder(checklist), "items": checklist_items}
+            for checklist, checklist_items in zip(checklists, items)
+        ]
     except SQLAlchemyError as e:
         logging.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error")
@@ -288,10 +508,9 @@ async def get_checklist(checklist_id: int):
         if not checklist:
             raise HTTPException(status_code=404, detail="Checklist not found")
 
-        items = await ChecklistItemDAO.find_all(checklist_id=checklist_id)
-        checklist["items"] = items
+        items = await ChecklistItemDAO.load_by('checklist_id', checklist_id)
 
-        return checklist
+        return {**jsonable_encoder(checklist), "items": items}
     except SQLAlchemyError as e:
         logging.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail="Database error")
@@ -328,6 +547,8 @@ async def create_checklist(request: Request):
         }
     except ValidationError as ve:
         raise HTTPException(status_code=422, detail=ve.errors())
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"DB Error on creating checklist: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -339,23 +560,14 @@ async def update_checklist(checklist_id: int, request: Request):
     try:
         data = await request.json()
 
-        existing_checklist = await ChecklistDAO.find_one_or_none(id=checklist_id)
-        if not existing_checklist:
-            raise HTTPException(status_code=404, detail="Checklist not found")
-
         if "deadline" in data:
             data["deadline"] = datetime.strptime(data["deadline"], '%Y-%m-%d').date()
 
-        updated_checklist = await ChecklistDAO.update(id=checklist_id, **data)
-
-        if "items" in data:
-            await ChecklistItemDAO.delete_all_for_checklist(checklist_id)
-            for item in data["items"]:
-                await ChecklistItemDAO.add(
-                    checklist_id=checklist_id,
-                    text=item["text"],
-                    completed=item.get("completed", False)
-                )
+        # Пункты синхронизируются по разнице со списком в БД, в одной транзакции с чек-листом
+        items = data.pop("items", None)
+        updated_checklist = await ChecklistDAO.update_with_items(checklist_id, items, **data)
+        if not updated_checklist:
+            raise HTTPException(status_code=404, detail="Checklist not found")
 
         return {
             "status": "success",
@@ -364,6 +576,8 @@ async def update_checklist(checklist_id: int, request: Request):
         }
     except ValidationError as ve:
         raise HTTPException(status_code=422, detail=ve.errors())
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"DB Error on updating checklist: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -373,21 +587,19 @@ async def update_checklist(checklist_id: int, request: Request):
 async def delete_checklist(checklist_id: int):
     """Delete checklist and all its items"""
     try:
-        existing_checklist = await ChecklistDAO.find_one_or_none(id=checklist_id)
-        if not existing_checklist:
-            raise HTTPException(status_code=404, detail="Checklist not found")
-
         await ChecklistItemDAO.delete_all_for_checklist(checklist_id)
         success = await ChecklistDAO.delete(id=checklist_id)
 
         if not success:
-            raise HTTPException(status_code=500, detail="Failed to delete checklist")
+            raise HTTPException(status_code=404, detail="Checklist not found")
 
         return {
             "status": "success",
             "message": "Checklist deleted successfully",
             "checklist_id": checklist_id
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"DB Error on deleting checklist: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
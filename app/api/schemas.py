@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
-from datetime import date
-from typing import Optional
+import datetime
+from typing import Any, Optional
 
 
 # Модель для валидации данных
@@ -11,7 +11,7 @@ class EventData(BaseModel):
         max_length=100,
         description="Название мероприятия"
     )
-    date: date = Field(
+    date: datetime.date = Field(
         ...,
         description="Дата проведения мероприятия"
     )
@@ -43,4 +43,34 @@ class ContractorData(BaseModel):
     )
     owner_id: str = Field(
         ...,
-        description="ID создателя")
\ No newline at end of file
+        description="ID создателя")
+
+
+class BatchItem(BaseModel):
+    """Запрос к API внутри пакетного запроса"""
+    method: str = Field(
+        "GET",
+        description="HTTP-метод, поддерживается только GET"
+    )
+    path: str = Field(
+        ...,
+        description="Путь к методу API, например /api/events"
+    )
+    params: dict[str, Any] = Field(
+        default_factory=dict,
+        description="Параметры строки запроса"
+    )
+    headers: dict[str, str] = Field(
+        default_factory=dict,
+        description="Заголовки запроса, например If-None-Match"
+    )
+
+
+class BatchData(BaseModel):
+    """Пакет запросов к API, выполняемых за один HTTP-запрос"""
+    requests: list[BatchItem] = Field(
+        ...,
+        min_length=1,
+        max_length=20,
+        description="Запросы пакета, не больше 20"
+    )
@@ -0,0 +1,56 @@
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+
+@dataclass
+class BudgetLine:
+    """Строка бюджета: статья, полная стоимость и внесённая предоплата."""
+    title: str
+    total: float
+    paid: float
+
+
+@dataclass
+class BudgetSummary:
+    """Итоги бюджета: общие суммы и строки по статьям или мероприятиям."""
+    total: float = 0.0
+    paid: float = 0.0
+    lines: list[BudgetLine] = field(default_factory=list)
+
+    @property
+    def remaining(self) -> float:
+        return self.total - self.paid
+
+    @property
+    def paid_share(self) -> float:
+        """Оплаченная доля бюджета в процентах."""
+        return self.paid / self.total * 100 if self.total > 0 else 0.0
+
+
+def summary_from_kopecks(lines: Iterable[tuple[str, int, int]]) -> BudgetSummary:
+    """
+    Сводка по строкам (название, стоимость, предоплата) с суммами в копейках.
+    Итоги складываются в целых копейках и переводятся в рубли один раз.
+    """
+    summary = BudgetSummary()
+    total = paid = 0
+    for title, line_total, line_paid in lines:
+        total += line_total
+        paid += line_paid
+        summary.lines.append(BudgetLine(title=title, total=line_total / 100, paid=line_paid / 100))
+    summary.total = total / 100
+    summary.paid = paid / 100
+    return summary
+
+
+def summary_from_budget(budget: dict[str, Any]) -> BudgetSummary:
+    """Сводка по бюджету пользователя из app.api.dao.BudgetDAO.get_owner_budget."""
+    return summary_from_kopecks((event["title"], event["total"], event["paid"]) for event in budget["events"])
+
+
+def format_budget_summary(summary: BudgetSummary, heading: str = "Общий бюджет ваших мероприятий") -> str:
+    return (
+        f"{heading}: {summary.total:.0f} руб.\n"
+        f"Оплачено: {summary.paid_share:.0f}% ({summary.paid:.0f} руб.)\n"
+        f"Осталось оплатить: {summary.remaining:.0f} руб."
+    )
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class AsyncCache:
+    """
+    Кэш результатов асинхронных загрузок по ключу.
+
+    - свежее значение (моложе ttl) отдаётся сразу;
+    - устаревшее, но моложе ttl + stale_ttl, тоже отдаётся сразу, а в фоне
+      запускается обновление (stale-while-revalidate);
+    - одновременные запросы одного ключа ждут одну общую загрузку.
+    """
+
+    def __init__(self, ttl: float = 60.0, stale_ttl: float = 600.0):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: dict[Hashable, tuple[Any, float]] = {}
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, loaded_at = entry
+            age = time.monotonic() - loaded_at
+            if age < self.ttl:
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self._refresh(key, loader)
+                return value
+
+        # shield: отмена одного ожидающего не должна отменять общую загрузку
+        return await asyncio.shield(self._refresh(key, loader))
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader))
+            task.add_done_callback(self._log_failure)
+            self._inflight[key] = task
+        return task
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+            self._entries[key] = (value, time.monotonic())
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logging.warning(f"Cache refresh failed: {task.exception()}")
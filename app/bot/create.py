@@ -2,15 +2,30 @@ from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
+from app.bot.middlewares import DatabaseMiddleware, ThrottlingMiddleware
+from app.bot.updates import UpdateQueue, UpdateDeduplicator
 from app.config import settings
 
 bot = Bot(token=settings.BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
 dp = Dispatcher()
+# Ограничение нагрузки раньше открытия единицы работы: отброшенный апдейт не занимает сессию
+throttling = ThrottlingMiddleware(
+    rate=settings.THROTTLE_RATE,
+    burst=settings.THROTTLE_BURST,
+    max_concurrency=settings.MAX_CONCURRENT_UPDATES
+)
+dp.update.outer_middleware(throttling)
+dp.update.outer_middleware(DatabaseMiddleware())
+update_queue = UpdateQueue(dp, bot, workers=settings.WEBHOOK_WORKERS, maxsize=settings.WEBHOOK_QUEUE_SIZE)
+update_dedup = UpdateDeduplicator(window=settings.UPDATE_DEDUP_WINDOW, shared=settings.UPDATE_DEDUP_SHARED)
 
 
 async def start_bot():
-    pass
+    if update_queue.enabled:
+        update_queue.start()
 
 
 async def stop_bot():
+    if update_queue.enabled:
+        await update_queue.stop()
     await bot.session.close()
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import TelegramObject, Update
+
+from app.database.db import unit_of_work
+
+
+class DatabaseMiddleware(BaseMiddleware):
+    """
+    Открывает единицу работы на время обработки апдейта.
+
+    Изменения фиксируются к концу каждого блока записи, поэтому ответы в Telegram
+    отправляются без удержания блокировки БД.
+    """
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        async with unit_of_work():
+            return await handler(event, data)
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Ограничивает частоту апдейтов от одного пользователя и общее число одновременно обрабатываемых апдейтов.
+
+    У каждого пользователя есть «ведро» на burst апдейтов, пополняемое со скоростью rate в секунду;
+    апдейты сверх него отбрасываются. Когда заняты все max_concurrency слотов, нажатия кнопок
+    (callback-запросы) отклоняются сразу, а сообщения ждут освобождения слота.
+    На отклонённые нажатия бот отвечает коротким уведомлением, иначе у пользователя
+    не пропадает индикатор загрузки на кнопке.
+    """
+
+    def __init__(self, rate: float = 1.0, burst: int = 5, max_concurrency: int = 32):
+        self.rate = rate
+        self.burst = burst
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        # user_id -> (токены, время последнего обновления); порядок - от давно не обращавшихся
+        self._buckets: OrderedDict[int, tuple[float, float]] = OrderedDict()
+        # Через столько секунд простоя ведро снова полное и запись можно удалить
+        self._idle_ttl = burst / rate
+        # Счётчики для мониторинга
+        self.throttled = 0
+        self.shed = 0
+
+    def _allow(self, user_id: int) -> bool:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(user_id, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        allowed = tokens >= 1
+        self._buckets[user_id] = (tokens - 1 if allowed else tokens, now)
+        self._expire(now)
+        return allowed
+
+    def _expire(self, now: float) -> None:
+        while self._buckets:
+            user_id, (_, updated) = next(iter(self._buckets.items()))
+            if now - updated < self._idle_ttl:
+                break
+            del self._buckets[user_id]
+
+    @staticmethod
+    async def _answer(data: Dict[str, Any], callback_query_id: str, text: str) -> None:
+        """Отвечает на отклонённое нажатие; ошибка ответа не должна ронять обработку апдейта."""
+        try:
+            await data["bot"].answer_callback_query(callback_query_id, text)
+        except TelegramAPIError as e:
+            logging.warning(f"Failed to answer rejected callback query: {e}")
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        callback = event.callback_query if isinstance(event, Update) else None
+        user = data.get("event_from_user")
+
+        if user is not None and not self._allow(user.id):
+            self.throttled += 1
+            if callback is not None:
+                await self._answer(data, callback.id, "Слишком часто, подождите немного")
+            return None
+
+        if callback is not None and self.semaphore.locked():
+            self.shed += 1
+            await self._answer(data, callback.id, "Бот перегружен, попробуйте ещё раз")
+            return None
+
+        async with self.semaphore:
+            return await handler(event, data)
@@ -3,9 +3,10 @@ from aiogram import Router, F
 from aiogram.filters import CommandStart, ChatMemberUpdatedFilter, MEMBER
 from aiogram.types import Message, CallbackQuery, ChatMemberUpdated
 from sqlalchemy.exc import SQLAlchemyError
-from app.api.dao import UserDAO
+from app.api.dao import UserDAO, BudgetDAO
+from app.bot.budget import summary_from_budget, format_budget_summary
 from app.bot.keyboards import main_menu_keyboard, budget_menu_keyboard, budget_summary_keyboard
-from app.bot.table import get_budget_info
+from app.config import settings
 
 router = Router()
 
@@ -24,15 +25,15 @@ async def greet_user(message: Message, is_new_user: bool) -> None:
 @router.message(CommandStart())
 async def cmd_start(message: Message) -> None:
     """Обрабатывает команду /start, регистрирует пользователя, если он новый."""
-    user = await UserDAO.find_one_or_none(telegram_id=message.from_user.id)
-    if not user:
-        await UserDAO.add(
-            telegram_id=message.from_user.id,
-            name=message.from_user.first_name,
-            username=message.from_user.username
-        )
+    # Регистрация и обновление имени одним запросом, без гонки между проверкой и вставкой
+    _, created = await UserDAO.upsert(
+        ('telegram_id',),
+        telegram_id=message.from_user.id,
+        name=message.from_user.first_name,
+        username=message.from_user.username
+    )
 
-    await greet_user(message, is_new_user=not user)
+    await greet_user(message, is_new_user=created)
 
 
 @router.callback_query(F.data == "back_to_main_menu")
@@ -56,11 +57,30 @@ async def budget_menu(callback: CallbackQuery):
 
 @router.callback_query(F.data == "budget_summary")
 async def show_budget_summary(callback: CallbackQuery):
-    gsheet_key = '1UJS5Ndx8IYD0q6uSeJbzUyGzGMGxSobSIYE1EpEFwIc'
+    if settings.BUDGET_SHEET_KEY:
+        # Модуль чтения таблиц нужен только этой кнопке и загружается при первом нажатии
+        from app.bot.table import fetch_budget_info
+
+        try:
+            summary = await fetch_budget_info(settings.BUDGET_SHEET_KEY)
+            await callback.message.edit_text(
+                format_budget_summary(summary, "Бюджет по таблице"),
+                reply_markup=budget_summary_keyboard()
+            )
+        except Exception as e:
+            await callback.answer(f"Ошибка: {str(e)}", show_alert=True)
+        return
+
     try:
-        result = get_budget_info(gsheet_key)
+        user = await UserDAO.find_one_or_none(telegram_id=callback.from_user.id)
+        if not user:
+            await callback.answer("Сначала отправьте /start", show_alert=True)
+            return
+
+        # Итоги считаются одним агрегирующим запросом по стоимости подрядчиков мероприятий
+        budget = await BudgetDAO.get_owner_budget(user.id)
         await callback.message.edit_text(
-            result,
+            format_budget_summary(summary_from_budget(budget)),
             reply_markup=budget_summary_keyboard()
         )
     except Exception as e:
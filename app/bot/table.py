@@ -1,31 +1,121 @@
-import pandas as pd
+import asyncio
+import csv
+import io
+import urllib.request
+import zipfile
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import partial
+from typing import Callable, Iterator
 
+from app.bot.budget import BudgetSummary, format_budget_summary, summary_from_kopecks
+from app.bot.cache import AsyncCache
+from app.utils.xlsx import XlsxRowReader
 
-def get_budget_info(gsheetkey):
-    sheet_name = 'Лист1'
-    url = f'https://docs.google.com/spreadsheet/ccc?key={gsheetkey}&output=xlsx'
-    df = pd.read_excel(url, sheet_name=sheet_name)
+SHEET_NAME = 'Лист1'
+TOTAL_COLUMN = 'Итого'
+PAID_COLUMN = 'Предоплата'
 
-    total_budget = df['Итого'].sum()
-    total_paid = df['Предоплата'].sum()
-    remaining_amount = total_budget - total_paid
 
-    if total_budget > 0:
-        paid_percentage = (total_paid / total_budget) * 100
-    else:
-        paid_percentage = 0
+def google_sheet_source(gsheetkey: str) -> str:
+    """Источник данных по умолчанию: выгрузка Google Sheet в XLSX."""
+    return f'https://docs.google.com/spreadsheet/ccc?key={gsheetkey}&output=xlsx'
 
-    result = (
-        f"Текущий бюджет мероприятия: {total_budget:.0f} руб.\n"
-        f"Оплачено: {paid_percentage:.0f}% ({total_paid:.0f} руб.)\n"
-        f"Осталось оплатить: {remaining_amount:.0f} руб."
+
+# Источник: функция, превращающая ключ таблицы в URL или путь к XLSX/CSV-файлу
+budget_source: Callable[[str], str] = google_sheet_source
+budget_cache = AsyncCache(ttl=60, stale_ttl=600)
+
+
+def _is_csv(location: str) -> bool:
+    return location.lower().endswith('.csv') or 'output=csv' in location
+
+
+def _column_indexes(header) -> tuple[int, int]:
+    columns = [str(name).strip() if name is not None else '' for name in header]
+    try:
+        return columns.index(TOTAL_COLUMN), columns.index(PAID_COLUMN)
+    except ValueError:
+        raise ValueError(f"В таблице нет столбцов «{TOTAL_COLUMN}» и «{PAID_COLUMN}»")
+
+
+def _pick(row, total_idx: int, paid_idx: int) -> tuple:
+    size = len(row)
+    return (
+        row[0] if size else None,
+        row[total_idx] if total_idx < size else None,
+        row[paid_idx] if paid_idx < size else None
+    )
+
+
+def _iter_budget_rows(location: str) -> Iterator[tuple]:
+    """
+    Построчно выдаёт (статья, итого, предоплата), не загружая таблицу целиком;
+    значения остальных столбцов не разбираются.
+    """
+    remote = location.startswith(('http://', 'https://'))
+
+    if _is_csv(location):
+        raw = urllib.request.urlopen(location) if remote else open(location, 'rb')
+        with raw:
+            reader = csv.reader(io.TextIOWrapper(raw, encoding='utf-8-sig', newline=''))
+            total_idx, paid_idx = _column_indexes(next(reader, []))
+            for row in reader:
+                yield _pick(row, total_idx, paid_idx)
+        return
+
+    # XLSX - zip-архив, ему нужен произвольный доступ, поэтому удалённый файл скачивается целиком
+    stream = io.BytesIO(urllib.request.urlopen(location).read()) if remote else location
+    with zipfile.ZipFile(stream) as archive:
+        reader = XlsxRowReader(archive, SHEET_NAME)
+        rows = iter(reader)
+        header = next(rows, {})
+        total_idx, paid_idx = _column_indexes([header.get(i) for i in range(max(header, default=-1) + 1)])
+        reader.wanted = {0, total_idx, paid_idx}
+        for row in rows:
+            yield row.get(0), row.get(total_idx), row.get(paid_idx)
+
+
+def _to_kopecks(value) -> int:
+    """Сумма ячейки в копейках, как в БД (EventContractor.cost); пустые и нечисловые ячейки - 0."""
+    if value is None or value == '':
+        return 0
+    try:
+        amount = Decimal(str(value).replace('\xa0', '').replace(' ', '').replace(',', '.'))
+    except InvalidOperation:
+        return 0
+    if not amount.is_finite():
+        return 0
+    return int((amount * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def read_budget(location: str) -> BudgetSummary:
+    """Считает бюджет по таблице, накапливая суммы в копейках по мере чтения строк."""
+    return summary_from_kopecks(
+        (str(title) if title is not None else '', _to_kopecks(total), _to_kopecks(paid))
+        for title, total, paid in _iter_budget_rows(location)
+        # Пустые строки (в CSV - пустые значения, в XLSX - пропущенные ячейки) не учитываются
+        if any(value not in (None, '') for value in (title, total, paid))
     )
 
-    return result
+
+def get_budget_info(gsheetkey, source: Callable[[str], str] = None) -> BudgetSummary:
+    return read_budget((source or budget_source)(gsheetkey))
+
+
+async def fetch_budget_info(gsheetkey, source: Callable[[str], str] = None) -> BudgetSummary:
+    """
+    Асинхронная версия get_budget_info: загрузка и разбор таблицы выполняются
+    в пуле потоков, результат кэшируется по ключу таблицы.
+    """
+    loop = asyncio.get_running_loop()
+    return await budget_cache.get(
+        (gsheetkey, source),
+        lambda: loop.run_in_executor(None, partial(get_budget_info, gsheetkey, source))
+    )
 
 
 # Пример использования
 if __name__ == "__main__":
     # Тестовая ссылка (замените на свою)
     key = "1UJS5Ndx8IYD0q6uSeJbzUyGzGMGxSobSIYE1EpEFwIc"
-    print(get_budget_info(key))
\ No newline at end of file
+    print(format_budget_summary(get_budget_info(key)))
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import time
+from typing import Any, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.types import Update
+
+from app.api.dao import ProcessedUpdateDAO
+
+
+class UpdateDeduplicator:
+    """
+    Отбрасывает повторные доставки апдейтов, которые Telegram шлёт, не дождавшись ответа вебхука.
+
+    Помнит последние window идентификаторов, включая ещё обрабатываемые: Telegram нумерует
+    апдейты подряд, поэтому хватает наибольшего полученного ID и битовой маски на window бит
+    (10 000 апдейтов - 1,25 КБ) вместо множества идентификаторов. Апдейт старше окна
+    считается новым, как и раньше, когда он вытеснялся из окна.
+    При shared=True апдейт дополнительно отмечается в БД, и повтор не обработает другой процесс.
+    """
+
+    def __init__(self, window: int, shared: bool = False):
+        if window < 1:
+            raise ValueError("Окно дедупликации должно быть не меньше одного апдейта")
+        self.window = window
+        self.shared = shared
+        # Бит update_id % window: апдейт из окна (high - window, high] уже получен
+        self._bits = bytearray((window + 7) // 8)
+        self._high: Optional[int] = None
+        self.duplicates = 0
+
+    def _in_window(self, update_id: int) -> bool:
+        return self._high is not None and self._high - self.window < update_id <= self._high
+
+    def _seen(self, update_id: int) -> bool:
+        slot = update_id % self.window
+        return self._in_window(update_id) and bool(self._bits[slot >> 3] & (1 << (slot & 7)))
+
+    def _remember(self, update_id: int) -> None:
+        if self._high is None or update_id - self._high >= self.window:
+            # Окно сдвинулось целиком: все прежние отметки устарели
+            self._bits = bytearray(len(self._bits))
+            self._high = update_id
+        elif update_id > self._high:
+            # Освобождаются биты идентификаторов, выходящих из окна
+            for old_id in range(self._high + 1, update_id + 1):
+                slot = old_id % self.window
+                self._bits[slot >> 3] &= ~(1 << (slot & 7)) & 0xFF
+            self._high = update_id
+        elif not self._in_window(update_id):
+            return
+        slot = update_id % self.window
+        self._bits[slot >> 3] |= 1 << (slot & 7)
+
+    def _forget(self, update_id: int) -> None:
+        if self._in_window(update_id):
+            slot = update_id % self.window
+            self._bits[slot >> 3] &= ~(1 << (slot & 7)) & 0xFF
+
+    async def is_duplicate(self, update_id: int) -> bool:
+        """Проверяет апдейт и, если он новый, запоминает его."""
+        if self._seen(update_id):
+            self.duplicates += 1
+            return True
+
+        # Запоминается до обращения к БД, чтобы одновременный повтор в этом процессе тоже был отброшен
+        self._remember(update_id)
+
+        if self.shared:
+            try:
+                claimed = await ProcessedUpdateDAO.claim(update_id, self.window)
+            except Exception:
+                self._forget(update_id)
+                raise
+            if not claimed:
+                # Локально помнятся только свои апдейты: владелец может снять отметку через release
+                self._forget(update_id)
+                self.duplicates += 1
+                return True
+        return False
+
+    async def release(self, update_id: int) -> None:
+        """Забывает апдейт, который не удалось обработать, чтобы его повторная доставка была принята."""
+        self._forget(update_id)
+        if self.shared:
+            await ProcessedUpdateDAO.release(update_id)
+
+
+class UpdateQueue:
+    """
+    Ограниченная очередь входящих апдейтов с пулом фоновых обработчиков.
+
+    Вебхук кладёт апдейт в очередь и сразу отвечает Telegram, не дожидаясь обработки.
+    Апдейты одного чата всегда попадают к одному обработчику и выполняются по порядку.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, workers: int, maxsize: int):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.workers = workers
+        self.maxsize = maxsize
+        self._queues: list[asyncio.Queue] = []
+        self._tasks: list[asyncio.Task] = []
+        self._depth = 0
+        # Счётчики для мониторинга
+        self.processed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.lag = 0.0
+        self.max_lag = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        """Очередь используется, только если настроен хотя бы один обработчик."""
+        return self.workers > 0
+
+    def start(self) -> None:
+        """Запускает обработчики; вызывается при старте приложения."""
+        for _ in range(self.workers):
+            queue = asyncio.Queue()
+            self._queues.append(queue)
+            self._tasks.append(asyncio.create_task(self._run(queue)))
+
+    async def stop(self) -> None:
+        """Дожидается обработки уже принятых апдейтов и останавливает обработчики."""
+        for queue in self._queues:
+            queue.put_nowait(None)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._queues.clear()
+        self._tasks.clear()
+
+    def put(self, update: Update) -> bool:
+        """
+        Ставит апдейт в очередь без ожидания.
+
+        Возвращает:
+            False, если очередь заполнена и апдейт не принят.
+        """
+        if self._depth >= self.maxsize:
+            self.rejected += 1
+            return False
+
+        queue = self._queues[self._shard(update) % len(self._queues)]
+        queue.put_nowait((update, time.monotonic()))
+        self._depth += 1
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "depth": self._depth,
+            "max_size": self.maxsize,
+            "processed": self.processed,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "lag": round(self.lag, 3),
+            "max_lag": round(self.max_lag, 3),
+        }
+
+    @staticmethod
+    def _shard(update: Update) -> int:
+        context = UserContextMiddleware.resolve_event_context(update)
+        if context.chat is not None:
+            return context.chat.id
+        if context.user is not None:
+            return context.user.id
+        return update.update_id
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        while True:
+            item: Optional[tuple[Update, float]] = await queue.get()
+            if item is None:
+                return
+
+            update, enqueued_at = item
+            # Задержка - время, которое апдейт провёл в очереди до начала обработки
+            self.lag = time.monotonic() - enqueued_at
+            self.max_lag = max(self.max_lag, self.lag)
+            try:
+                await self.dispatcher.feed_update(self.bot, update)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logging.error(f"Error processing update {update.update_id}: {e}", exc_info=True)
+            finally:
+                self._depth -= 1
@@ -1,4 +1,6 @@
+import hashlib
 import os
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -6,6 +8,22 @@ class Settings(BaseSettings):
     BOT_TOKEN: str
     BASE_SITE: str
     ADMIN_ID: int
+    # Фоновая обработка апдейтов (app.bot.updates): 0 - апдейт обрабатывается внутри запроса вебхука
+    WEBHOOK_WORKERS: int = 0
+    WEBHOOK_QUEUE_SIZE: int = 1000
+    # Дедупликация повторных доставок: сколько последних апдейтов помнить и делить ли окно между процессами через БД
+    UPDATE_DEDUP_WINDOW: int = 10000
+    UPDATE_DEDUP_SHARED: bool = False
+    # Ограничение нагрузки (app.bot.middlewares.ThrottlingMiddleware): апдейтов в секунду и запас
+    # на одного пользователя, число апдейтов, обрабатываемых одновременно
+    THROTTLE_RATE: float = 1.0
+    THROTTLE_BURST: int = 5
+    MAX_CONCURRENT_UPDATES: int = 32
+    # Секрет вебхука: Telegram присылает его в заголовке X-Telegram-Bot-Api-Secret-Token.
+    # Не задан - выводится из токена бота, чтобы все процессы знали один и тот же
+    WEBHOOK_SECRET: Optional[str] = None
+    # Ключ Google Sheet с бюджетом (app.bot.table); не задан - сводка считается по БД
+    BUDGET_SHEET_KEY: Optional[str] = None
     model_config = SettingsConfigDict(
         env_file=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".env")
     )
@@ -14,5 +32,9 @@ class Settings(BaseSettings):
         """Возвращает URL вебхука с кодированием специальных символов."""
         return f"{self.BASE_SITE}/webhook"
 
+    def get_webhook_secret(self) -> str:
+        """Возвращает секрет вебхука (допустимые символы Telegram: A-Z, a-z, 0-9, _ и -)."""
+        return self.WEBHOOK_SECRET or hashlib.sha256(self.BOT_TOKEN.encode()).hexdigest()
+
 
 settings = Settings()
\ No newline at end of file
@@ -1,13 +1,174 @@
-from sqlalchemy import func
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import BigInteger, func, event
+from sqlalchemy.pool import NullPool
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase
 from sqlalchemy.ext.asyncio import AsyncAttrs, async_sessionmaker, create_async_engine, AsyncSession
 
 database_url = 'sqlite+aiosqlite:///app/db.sqlite3'
-engine = create_async_engine(url=database_url)
-async_session_maker = async_sessionmaker(engine, class_=AsyncSession)
+busy_timeout_ms = 5000
+
+# Единственное пишущее соединение: все изменения проходят через очередь записи (app.database.writer)
+engine = create_async_engine(url=database_url, pool_size=1, max_overflow=0)
+# Пул соединений только для чтения
+read_engine = create_async_engine(url=database_url, pool_size=5, max_overflow=5)
+# Соединения для потоковых выборок (выгрузки): открываются на время перебора и не занимают
+# пул чтения, пока медленный клиент скачивает файл
+stream_engine = create_async_engine(url=database_url, poolclass=NullPool)
+
+async_session_maker = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+stream_session_maker = async_sessionmaker(stream_engine, class_=AsyncSession, expire_on_commit=False)
+write_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@event.listens_for(engine.sync_engine, 'connect')
+def _configure_writer(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute(f'PRAGMA busy_timeout={busy_timeout_ms}')
+    cursor.close()
+    # Транзакциями управляет SQLAlchemy (см. _begin_immediate), иначе не работают SAVEPOINT
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine.sync_engine, 'begin')
+def _begin_immediate(connection):
+    # Блокировка на запись берётся сразу, а не при первом изменении посреди транзакции
+    connection.exec_driver_sql('BEGIN IMMEDIATE')
+
+
+@event.listens_for(read_engine.sync_engine, 'connect')
+@event.listens_for(stream_engine.sync_engine, 'connect')
+def _configure_reader(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f'PRAGMA busy_timeout={busy_timeout_ms}')
+    cursor.execute('PRAGMA query_only=ON')
+    cursor.close()
+
+
+class UnitOfWork:
+    """
+    Сессия чтения, общая для всех обращений к БД в рамках одного запроса или апдейта.
+
+    Изменения выполняются через очередь записи (app.database.writer.write_scope)
+    и фиксируются каждое к выходу из своего блока; после этого сессия чтения
+    сбрасывается, и следующие чтения видят их.
+    """
+
+    def __init__(self):
+        self.session = async_session_maker()
+        # AsyncSession нельзя использовать из нескольких задач одновременно
+        self.lock = asyncio.Lock()
+        # Загрузчики связанных записей (app.api.loader), живут до конца запроса
+        self.loaders = {}
+
+
+_current_uow: ContextVar[Optional[UnitOfWork]] = ContextVar('current_uow', default=None)
+_active_session: ContextVar[Optional[AsyncSession]] = ContextVar('active_session', default=None)
+
+
+@asynccontextmanager
+async def unit_of_work():
+    """
+    Открывает единицу работы: все чтения внутри используют одну сессию,
+    которая закрывается при выходе.
+    Вложенный вызов присоединяется к уже открытой единице работы.
+    """
+    current = _current_uow.get()
+    if current is not None:
+        yield current
+        return
+
+    uow = UnitOfWork()
+    token = _current_uow.set(uow)
+    try:
+        yield uow
+        await uow.session.commit()
+    except BaseException:
+        await uow.session.rollback()
+        raise
+    finally:
+        _current_uow.reset(token)
+        await uow.session.close()
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    """Возвращает открытую единицу работы или None."""
+    return _current_uow.get()
+
+
+async def get_unit_of_work():
+    """Зависимость FastAPI: единица работы на время обработки запроса."""
+    async with unit_of_work() as uow:
+        yield uow
+
+
+@asynccontextmanager
+async def session_scope():
+    """
+    Возвращает сессию чтения для DAO-метода.
+
+    Внутри блока записи - сессию писателя, внутри единицы работы - её общую сессию,
+    вне её - отдельную. Для изменений используется app.database.writer.write_scope.
+    """
+    active = _active_session.get()
+    if active is not None:
+        yield active
+        return
+
+    uow = _current_uow.get()
+    if uow is None:
+        async with async_session_maker() as session:
+            token = _active_session.set(session)
+            try:
+                yield session
+                await session.commit()
+            except BaseException:
+                await session.rollback()
+                raise
+            finally:
+                _active_session.reset(token)
+        return
+
+    async with uow.lock:
+        token = _active_session.set(uow.session)
+        try:
+            yield uow.session
+            await uow.session.flush()
+        finally:
+            _active_session.reset(token)
+
+
+def set_active_session(session: AsyncSession):
+    """Делает session сессией чтения текущего контекста; возвращает токен для reset_active_session."""
+    return _active_session.set(session)
+
+
+def reset_active_session(token) -> None:
+    _active_session.reset(token)
+
+
+_last_version = 0
+
+
+def _next_version() -> int:
+    """Время в наносекундах, строго возрастающее в пределах процесса, даже если часы перевели назад."""
+    global _last_version
+    _last_version = max(time.time_ns(), _last_version + 1)
+    return _last_version
 
 
 class Base(AsyncAttrs, DeclarativeBase):
     created_at: Mapped[datetime] = mapped_column(server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(server_default=func.now(), onupdate=func.now())
+    # Версия строки для ETag (app.api.base.BaseDAO.get_version): меняется при каждой вставке
+    # и изменении; в отличие от updated_at различает изменения в пределах одной секунды
+    version: Mapped[int] = mapped_column(
+        BigInteger, default=_next_version, onupdate=_next_version, server_default='0'
+    )
@@ -1,7 +1,7 @@
 from datetime import date
 from typing import List, Optional
 
-from sqlalchemy import String, BigInteger, Integer, Date, ForeignKey, Boolean
+from sqlalchemy import String, BigInteger, Integer, Date, ForeignKey, Boolean, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database.db import Base
@@ -24,6 +24,9 @@ class User(Base):
 
 class Event(Base):
     __tablename__ = 'events'
+    __table_args__ = (
+        Index('ix_events_owner_id_date', 'owner_id', 'date'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     owner_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
@@ -41,6 +44,9 @@ class Event(Base):
 
 class ContractorCategory(Base):
     __tablename__ = 'contractor_categories'
+    __table_args__ = (
+        Index('ix_contractor_categories_owner_id', 'owner_id'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     owner_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
@@ -53,6 +59,10 @@ class ContractorCategory(Base):
 
 class Contractor(Base):
     __tablename__ = 'contractors'
+    __table_args__ = (
+        Index('ix_contractors_owner_id_name', 'owner_id', 'name'),
+        Index('ix_contractors_category_id', 'category_id'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     owner_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
@@ -68,6 +78,9 @@ class Contractor(Base):
 
 class Task(Base):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        Index('ix_tasks_event_id_date', 'event_id', 'date'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     event_id: Mapped[int] = mapped_column(ForeignKey('events.id', ondelete='CASCADE'), nullable=False)
@@ -81,8 +94,15 @@ class Task(Base):
 
 class ChecklistItem(Base):
     __tablename__ = 'checklist_items'
+    __table_args__ = (
+        Index('ix_checklist_items_checklist_id', 'checklist_id'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # NULL допускается, как и в миграции 9c5d1e8a2f60: у пунктов, созданных до неё, родителя нет
+    checklist_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey('checklists.id', ondelete='CASCADE'), nullable=True
+    )
     title: Mapped[str] = mapped_column(String(200), nullable=False)
 
     # Связи
@@ -91,6 +111,9 @@ class ChecklistItem(Base):
 
 class Checklist(Base):
     __tablename__ = 'checklists'
+    __table_args__ = (
+        Index('ix_checklists_owner_id', 'owner_id'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     owner_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
@@ -104,6 +127,9 @@ class Checklist(Base):
 class EventContractor(Base):
     """Связь мероприятий и подрядчиков"""
     __tablename__ = 'event_contractors'
+    __table_args__ = (
+        Index('ix_event_contractors_contractor_id', 'contractor_id'),
+    )
 
     event_id: Mapped[int] = mapped_column(
         ForeignKey('events.id', ondelete='CASCADE'),
@@ -113,7 +139,9 @@ class EventContractor(Base):
         ForeignKey('contractors.id', ondelete='CASCADE'),
         primary_key=True
     )
-    cost: Mapped[Optional[str]] = mapped_column(String)
+    # Суммы хранятся в копейках
+    cost: Mapped[Optional[int]] = mapped_column(Integer)
+    paid: Mapped[int] = mapped_column(Integer, default=0, server_default='0', nullable=False)
 
     # Связи
     event: Mapped['Event'] = relationship(back_populates='contractors_link')
@@ -123,6 +151,9 @@ class EventContractor(Base):
 class EventChecklist(Base):
     """Связь мероприятий и чек-листов"""
     __tablename__ = 'event_checklists'
+    __table_args__ = (
+        Index('ix_event_checklists_checklist_id', 'checklist_id'),
+    )
 
     event_id: Mapped[int] = mapped_column(
         ForeignKey('events.id', ondelete='CASCADE'),
@@ -140,8 +171,18 @@ class EventChecklist(Base):
     checklist: Mapped['Checklist'] = relationship(back_populates='events_link')
 
 
+class ProcessedUpdate(Base):
+    """Апдейты Telegram, принятые вебхуком (общее окно дедупликации для нескольких процессов)"""
+    __tablename__ = 'processed_updates'
+
+    update_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+
+
 class CompletedChecklistItem(Base):
     __tablename__ = 'completed_checklist_items'
+    __table_args__ = (
+        Index('ix_completed_checklist_items_item_id', 'item_id'),
+    )
 
     event_id: Mapped[int] = mapped_column(
         ForeignKey('events.id', ondelete='CASCADE'),
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database.db import (
+    current_unit_of_work,
+    reset_active_session,
+    set_active_session,
+    write_session_maker
+)
+
+_active_write_session: ContextVar[Optional[AsyncSession]] = ContextVar('active_write_session', default=None)
+_commit_callbacks: ContextVar[Optional[list[Callable[[], None]]]] = ContextVar('commit_callbacks', default=None)
+
+
+class _WriteTicket:
+    """Заявка на запись: ожидает своей очереди в общей транзакции писателя."""
+    __slots__ = ('ready', 'done', 'committed')
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.ready = loop.create_future()
+        self.done = loop.create_future()
+        self.committed = loop.create_future()
+
+
+def _fail(future: asyncio.Future, error: BaseException) -> None:
+    if future.done():
+        return
+    if isinstance(error, asyncio.CancelledError):
+        future.cancel()
+    else:
+        future.set_exception(error)
+
+
+class WriteQueue:
+    """
+    Очередь записи в SQLite с групповой фиксацией.
+
+    Все изменения выполняются одним фоновым писателем через единственное
+    соединение. Заявки, накопившиеся в очереди, выполняются по очереди в одной
+    транзакции (каждая - в своей точке сохранения, чтобы ошибка одной не
+    откатывала остальные) и фиксируются одним COMMIT.
+    """
+
+    def __init__(self, session_maker: async_sessionmaker, max_batch: int = 64):
+        self.session_maker = session_maker
+        self.max_batch = max_batch
+        self.batches = 0
+        self.operations = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not asyncio.get_running_loop():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        return self._queue
+
+    async def _acquire(self) -> tuple[_WriteTicket, AsyncSession]:
+        """Ставит заявку в очередь и дожидается сессии писателя."""
+        queue = self._ensure_worker()
+        ticket = _WriteTicket(asyncio.get_running_loop())
+        queue.put_nowait(ticket)
+
+        try:
+            return ticket, await ticket.ready
+        except BaseException as e:
+            # Отмена могла прийти уже после того, как писатель выдал сессию
+            if ticket.ready.done() and not ticket.ready.cancelled():
+                ticket.done.set_result(e)
+            raise
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Выполняет блок внутри групповой транзакции писателя.
+
+        Заявка держится только на время блока. Выход из блока дожидается фиксации
+        всей группы, поэтому после него изменения гарантированно видны остальным
+        соединениям. Чтения внутри блока идут через сессию писателя и видят его изменения.
+        """
+        if _active_write_session.get() is not None:
+            # Новая заявка встала бы в очередь за уже выданной и ждала бы вечно
+            raise RuntimeError("Блок записи уже открыт, используйте write_scope")
+
+        ticket, session = await self._acquire()
+        callbacks: list[Callable[[], None]] = []
+        write_token = _active_write_session.set(session)
+        read_token = set_active_session(session)
+        callbacks_token = _commit_callbacks.set(callbacks)
+        try:
+            yield session
+            await session.flush()
+        except BaseException as e:
+            ticket.done.set_result(e)
+            raise
+        else:
+            ticket.done.set_result(None)
+        finally:
+            _commit_callbacks.reset(callbacks_token)
+            reset_active_session(read_token)
+            _active_write_session.reset(write_token)
+
+        await ticket.committed
+        for callback in callbacks:
+            callback()
+
+    async def stop(self) -> None:
+        """Останавливает фонового писателя."""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+    async def _run(self) -> None:
+        while True:
+            ticket = await self._queue.get()
+            try:
+                await self._run_batch(ticket)
+            except Exception as e:
+                logging.error(f"Write queue batch failed: {e}", exc_info=True)
+
+    async def _run_batch(self, ticket: _WriteTicket) -> None:
+        applied: list[_WriteTicket] = []
+        async with self.session_maker() as session:
+            try:
+                # Заявки, пришедшие во время обработки группы, присоединяются к ней же
+                while ticket is not None:
+                    if not ticket.ready.cancelled():
+                        applied.append(ticket)
+                        savepoint = await session.begin_nested()
+                        ticket.ready.set_result(session)
+                        error = await ticket.done
+                        if error is None:
+                            await savepoint.commit()
+                        else:
+                            await savepoint.rollback()
+                            applied.pop()
+                        session.expunge_all()
+
+                    ticket = None
+                    if len(applied) < self.max_batch and not self._queue.empty():
+                        ticket = self._queue.get_nowait()
+
+                if applied:
+                    await session.commit()
+            except BaseException as e:
+                await session.rollback()
+                for t in applied:
+                    _fail(t.committed if t.ready.done() else t.ready, e)
+                raise
+
+        self.batches += 1
+        self.operations += len(applied)
+        for t in applied:
+            if not t.committed.done():
+                t.committed.set_result(None)
+
+
+write_queue = WriteQueue(write_session_maker)
+
+
+def after_commit(callback: Callable[[], None]) -> None:
+    """
+    Вызывает callback после фиксации текущего блока записи (WriteQueue.transaction).
+    Вне блока записи - сразу.
+    """
+    callbacks = _commit_callbacks.get()
+    if callbacks is None:
+        callback()
+    else:
+        callbacks.append(callback)
+
+
+@asynccontextmanager
+async def write_scope():
+    """
+    Возвращает сессию для изменяющего DAO-метода.
+
+    Вложенный вызов использует уже выданную сессию писателя, поэтому несколько
+    изменений, которые должны пройти вместе, оборачиваются во внешний write_scope.
+    Иначе блок - отдельная заявка, зафиксированная к выходу из него: заявка и
+    блокировка SQLite на запись не удерживаются, пока обработчик ждёт сеть.
+    """
+    active = _active_write_session.get()
+    if active is not None:
+        yield active
+        return
+
+    async with write_queue.transaction() as session:
+        yield session
+
+    uow = current_unit_of_work()
+    if uow is not None:
+        # Загрузчики и сессия чтения единицы работы могли запомнить записи до изменения
+        uow.loaders.clear()
+        async with uow.lock:
+            uow.session.expunge_all()
+            await uow.session.commit()
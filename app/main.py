@@ -1,24 +1,25 @@
+import hmac
 import logging
 from contextlib import asynccontextmanager
-from app.bot.create import bot, dp, stop_bot, start_bot
+from app.bot.create import bot, dp, stop_bot, start_bot, update_queue, update_dedup, throttling
 from app.bot.router import router
 from app.config import settings
+from app.database.writer import write_queue
 from aiogram.types import Update
-from fastapi import FastAPI, Request, HTTPException
-from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
-from app.pages.router import router as router_pages
+from fastapi import Depends, FastAPI, Request, HTTPException
+from app.pages.assets import AssetFiles
+from app.pages.router import router as router_pages, warm_pages
 from app.api.router import router as router_API
+from app.api.dao import UserDAO, ContractorCategoryDAO
 
 # Инициализация логирования
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Подключение Jinja2 для рендеринга HTML
-templates = Jinja2Templates(directory="app/templates")
-
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Шаблоны компилируются до приёма запросов, а не на первом запросе после деплоя
+    warm_pages()
     logging.info("Starting bot setup...")
     dp.include_router(router)
 
@@ -27,6 +28,7 @@ async def lifespan(app: FastAPI):
         webhook_url = settings.get_webhook_url()
         await bot.set_webhook(url=webhook_url,
                               allowed_updates=dp.resolve_used_update_types(),
+                              secret_token=settings.get_webhook_secret(),
                               drop_pending_updates=True)
         logging.info(f"Webhook set to {webhook_url}")
     except Exception as e:
@@ -38,6 +40,7 @@ async def lifespan(app: FastAPI):
     try:
         await bot.delete_webhook()
         await stop_bot()
+        await write_queue.stop()
         logging.info("Webhook deleted and bot stopped successfully.")
     except Exception as e:
         logging.error(f"Error during bot shutdown: {e}", exc_info=True)
@@ -46,15 +49,57 @@ async def lifespan(app: FastAPI):
 app = FastAPI(lifespan=lifespan)
 app.include_router(router_pages)
 app.include_router(router_API)
-# Поддержка статических файлов
-app.mount('/static', StaticFiles(directory='app/static'), name='static')
+# Статические файлы: собранные (python -m app.pages.assets) раздаются сжатыми и с долгим кэшем
+app.mount('/static', AssetFiles(directory='app/static'), name='static')
+
 
+def verify_webhook_secret(request: Request) -> None:
+    """Пропускает только запросы с секретом вебхука (см. Settings.get_webhook_secret)."""
+    token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+    if not hmac.compare_digest(token.encode(), settings.get_webhook_secret().encode()):
+        raise HTTPException(status_code=403, detail="Invalid webhook secret token.")
 
-@app.post("/webhook")
+
+@app.post("/webhook", dependencies=[Depends(verify_webhook_secret)])
 async def webhook(request: Request) -> None:
     try:
-        json_data = await request.json()
-        await dp.feed_webhook_update(bot, Update(**json_data))
+        # Один проход: байты тела сразу валидируются в Update, уже привязанный к боту,
+        # иначе dispatcher пересоздаёт апдейт через model_dump/model_validate
+        update = Update.model_validate_json(await request.body(), context={"bot": bot})
     except Exception as e:
         logging.error(f"Error processing update: {e}", exc_info=True)
         raise HTTPException(status_code=400, detail="Failed to process webhook update.")
+
+    # Повторная доставка уже принятого апдейта подтверждается без обработки
+    if await update_dedup.is_duplicate(update.update_id):
+        return
+
+    if not update_queue.enabled:
+        try:
+            await dp.feed_webhook_update(bot, update)
+        except Exception as e:
+            await update_dedup.release(update.update_id)
+            logging.error(f"Error processing update: {e}", exc_info=True)
+            raise HTTPException(status_code=400, detail="Failed to process webhook update.")
+        return
+
+    # Быстрый ответ: апдейт обрабатывается в фоне, при переполнении очереди Telegram повторит доставку
+    if not update_queue.put(update):
+        await update_dedup.release(update.update_id)
+        raise HTTPException(status_code=429, detail="Update queue is full.")
+
+
+@app.get("/webhook/stats", dependencies=[Depends(verify_webhook_secret)])
+async def webhook_stats() -> dict:
+    """Глубина и задержка очереди апдейтов, число отброшенных повторов и ограниченных апдейтов,
+    попадания и промахи кэшей сущностей"""
+    return {
+        **update_queue.stats(),
+        "duplicates": update_dedup.duplicates,
+        "throttled": throttling.throttled,
+        "shed": throttling.shed,
+        "cache": {
+            "users": UserDAO.cache.stats(),
+            "contractor_categories": ContractorCategoryDAO.cache.stats(),
+        },
+    }
@@ -0,0 +1,42 @@
+"""indexes
+
+Revision ID: 4b9e2f7c1a3d
+Revises: 16ad6bfdf6a1
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b9e2f7c1a3d'
+down_revision: Union[str, None] = '16ad6bfdf6a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_events_owner_id_date', 'events', ['owner_id', 'date'], unique=False)
+    op.create_index('ix_contractor_categories_owner_id', 'contractor_categories', ['owner_id'], unique=False)
+    op.create_index('ix_contractors_owner_id_name', 'contractors', ['owner_id', 'name'], unique=False)
+    op.create_index('ix_contractors_category_id', 'contractors', ['category_id'], unique=False)
+    op.create_index('ix_tasks_event_id_date', 'tasks', ['event_id', 'date'], unique=False)
+    op.create_index('ix_checklists_owner_id', 'checklists', ['owner_id'], unique=False)
+    op.create_index('ix_event_contractors_contractor_id', 'event_contractors', ['contractor_id'], unique=False)
+    op.create_index('ix_event_checklists_checklist_id', 'event_checklists', ['checklist_id'], unique=False)
+    op.create_index('ix_completed_checklist_items_item_id', 'completed_checklist_items', ['item_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_completed_checklist_items_item_id', table_name='completed_checklist_items')
+    op.drop_index('ix_event_checklists_checklist_id', table_name='event_checklists')
+    op.drop_index('ix_event_contractors_contractor_id', table_name='event_contractors')
+    op.drop_index('ix_checklists_owner_id', table_name='checklists')
+    op.drop_index('ix_tasks_event_id_date', table_name='tasks')
+    op.drop_index('ix_contractors_category_id', table_name='contractors')
+    op.drop_index('ix_contractors_owner_id_name', table_name='contractors')
+    op.drop_index('ix_contractor_categories_owner_id', table_name='contractor_categories')
+    op.drop_index('ix_events_owner_id_date', table_name='events')
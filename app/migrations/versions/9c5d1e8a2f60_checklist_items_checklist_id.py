@@ -0,0 +1,35 @@
+"""checklist_items checklist_id
+
+Revision ID: 9c5d1e8a2f60
+Revises: 4b9e2f7c1a3d
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c5d1e8a2f60'
+down_revision: Union[str, None] = '4b9e2f7c1a3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Столбец допускает NULL на уровне БД: у уже существующих пунктов родителя нет
+    with op.batch_alter_table('checklist_items') as batch_op:
+        batch_op.add_column(sa.Column('checklist_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            'fk_checklist_items_checklist_id', 'checklists', ['checklist_id'], ['id'], ondelete='CASCADE'
+        )
+        batch_op.create_index('ix_checklist_items_checklist_id', ['checklist_id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('checklist_items') as batch_op:
+        batch_op.drop_index('ix_checklist_items_checklist_id')
+        batch_op.drop_constraint('fk_checklist_items_checklist_id', type_='foreignkey')
+        batch_op.drop_column('checklist_id')
@@ -0,0 +1,44 @@
+"""row version
+
+Revision ID: a1c4e7f9b203
+Revises: 6f1b8e2d4c07
+Create Date: 2026-10-18 18:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c4e7f9b203'
+down_revision: Union[str, None] = '6f1b8e2d4c07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = (
+    'users',
+    'events',
+    'contractor_categories',
+    'contractors',
+    'tasks',
+    'checklist_items',
+    'checklists',
+    'event_contractors',
+    'event_checklists',
+    'processed_updates',
+    'completed_checklist_items',
+)
+
+
+def upgrade() -> None:
+    # Версию новым и изменённым строкам назначает приложение; у существующих она 0
+    for table in TABLES:
+        op.add_column(table, sa.Column('version', sa.BigInteger(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('version')
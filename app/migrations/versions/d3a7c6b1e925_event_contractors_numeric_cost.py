@@ -0,0 +1,88 @@
+"""event_contractors numeric cost
+
+Revision ID: d3a7c6b1e925
+Revises: 9c5d1e8a2f60
+Create Date: 2026-10-18 15:10:00.000000
+
+"""
+import re
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a7c6b1e925'
+down_revision: Union[str, None] = '9c5d1e8a2f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Ровно одно число: целая часть (возможно, с разрядами через пробел, точку или запятую),
+# копейки, множитель («5к», «1,5 млн») и обозначение валюты до или после числа
+_AMOUNT = re.compile(r"""
+    (?:(?:₽|руб\.?|р\.|rub|rur)\s*)?
+    (?P<integer>\d{1,3}(?P<group>[ .,])\d{3}(?:(?P=group)\d{3})*|\d+)
+    (?:(?P<point>[.,])(?P<fraction>\d{1,2}))?
+    \s*(?P<unit>к|k|тыс\.?|млн\.?)?
+    \s*(?:руб(?:\.|лей|ля|ль)?|р\.?|₽|rub|rur)?
+""", re.VERBOSE | re.IGNORECASE)
+_UNITS = {'к': 1000, 'k': 1000, 'тыс': 1000, 'млн': 1000000}
+
+
+def _parse_amount(value) -> Optional[int]:
+    """
+    Сумма в копейках из строки вида «15 000 руб.», «1 500,50», «1.500.000», «₽ 200» или «5к».
+
+    Строки, где нет числа или чисел несколько («от 10000 до 15000», «12.5.2024»),
+    дают None: лучше потерять сумму, чем сохранить неверную.
+    """
+    text = re.sub(r'[\xa0\u2009\u202f]', ' ', str(value)).strip()
+    match = _AMOUNT.fullmatch(text)
+    if match is None or not match.group('integer'):
+        return None
+    # «1.500.50»: один и тот же знак не может отделять и разряды, и копейки
+    if match.group('group') and match.group('group') == match.group('point'):
+        return None
+
+    amount = Decimal(re.sub(r'[ .,]', '', match.group('integer')))
+    if match.group('fraction'):
+        amount += Decimal(match.group('fraction').ljust(2, '0')) / 100
+    if match.group('unit'):
+        amount *= _UNITS[match.group('unit').rstrip('.').lower()]
+    return int((amount * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.text('SELECT event_id, contractor_id, cost FROM event_contractors WHERE cost IS NOT NULL')
+    ).all()
+    # Пока столбец текстовый, числа сохраняются строками и приводятся к INTEGER при пересоздании таблицы
+    for event_id, contractor_id, cost in rows:
+        connection.execute(
+            sa.text('UPDATE event_contractors SET cost = :cost WHERE event_id = :event_id AND contractor_id = :contractor_id'),
+            {'cost': _parse_amount(cost), 'event_id': event_id, 'contractor_id': contractor_id}
+        )
+
+    with op.batch_alter_table('event_contractors') as batch_op:
+        batch_op.alter_column('cost', existing_type=sa.String(), type_=sa.Integer(), existing_nullable=True)
+        batch_op.add_column(sa.Column('paid', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('event_contractors') as batch_op:
+        batch_op.drop_column('paid')
+        batch_op.alter_column('cost', existing_type=sa.Integer(), type_=sa.String(), existing_nullable=True)
+
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.text('SELECT event_id, contractor_id, cost FROM event_contractors WHERE cost IS NOT NULL')
+    ).all()
+    for event_id, contractor_id, cost in rows:
+        connection.execute(
+            sa.text('UPDATE event_contractors SET cost = :cost WHERE event_id = :event_id AND contractor_id = :contractor_id'),
+            {'cost': f'{Decimal(int(cost)) / 100:.2f}', 'event_id': event_id, 'contractor_id': contractor_id}
+        )
@@ -0,0 +1,201 @@
+"""
+Сборка и раздача статических файлов WebApp.
+
+Сборка (при деплое, до запуска приложения):
+    python -m app.pages.assets
+
+копирует файлы app/static в app/static/build под именами с хэшем содержимого,
+рядом кладёт сжатые gzip и brotli варианты (без пакета brotli из requirements.txt
+варианты .br пропускаются) и записывает manifest.json. Шаблоны получают адреса
+файлов через asset(), а AssetFiles раздаёт собранные файлы с Cache-Control: immutable.
+Без сборки asset() возвращает исходные адреса.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = 'app/static'
+STATIC_URL = '/static'
+BUILD_DIR = 'build'
+MANIFEST_PATH = os.path.join(STATIC_DIR, BUILD_DIR, 'manifest.json')
+
+COMPRESSIBLE = {'.js', '.css', '.svg', '.json', '.html', '.txt'}
+# Сжатый вариант сохраняется, только если он заметно меньше исходного
+MIN_COMPRESSION_GAIN = 0.9
+CSS_URL = re.compile(r"""url\((['"]?)(?!data:|https?:|//)([^'")]+)\1\)""")
+
+
+def _fingerprint(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()[:12]
+
+
+def _rewrite_css(content: bytes, source: str, files: dict[str, str]) -> bytes:
+    """Заменяет относительные ссылки url(...) в CSS на собранные файлы."""
+    directory = posixpath.dirname(source)
+
+    def replace(match: re.Match) -> str:
+        target = posixpath.normpath(posixpath.join(directory, match.group(2)))
+        built = files.get(target)
+        if built is None:
+            return match.group(0)
+        return f"url({match.group(1)}{STATIC_URL}/{built}{match.group(1)})"
+
+    return CSS_URL.sub(replace, content.decode('utf-8')).encode('utf-8')
+
+
+def _write_variants(path: str, content: bytes) -> list[str]:
+    encodings = []
+    variants = [('br', '.br', brotli.compress if brotli else None), ('gzip', '.gz', _gzip)]
+    for encoding, suffix, compress in variants:
+        if compress is None:
+            continue
+        compressed = compress(content)
+        if len(compressed) < len(content) * MIN_COMPRESSION_GAIN:
+            with open(path + suffix, 'wb') as file:
+                file.write(compressed)
+            encodings.append(encoding)
+    return encodings
+
+
+def _gzip(content: bytes) -> bytes:
+    # mtime=0: одинаковое содержимое даёт одинаковый архив
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def build(static_dir: str = STATIC_DIR) -> dict:
+    """
+    Собирает статические файлы и возвращает манифест.
+
+    Манифест: {"files": {исходный путь: собранный путь}, "encodings": {собранный путь: [кодировки]}}.
+    """
+    output_dir = os.path.join(static_dir, BUILD_DIR)
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    sources = []
+    for root, dirs, names in os.walk(static_dir):
+        dirs[:] = [name for name in dirs if os.path.join(root, name) != output_dir]
+        for name in names:
+            sources.append(os.path.relpath(os.path.join(root, name), static_dir).replace(os.sep, '/'))
+    # CSS ссылается на картинки, поэтому собирается после них
+    sources.sort(key=lambda source: (source.endswith('.css'), source))
+
+    manifest = {'files': {}, 'encodings': {}}
+    for source in sources:
+        with open(os.path.join(static_dir, source), 'rb') as file:
+            content = file.read()
+        if source.endswith('.css'):
+            content = _rewrite_css(content, source, manifest['files'])
+
+        stem, extension = posixpath.splitext(source)
+        built = f'{BUILD_DIR}/{stem}.{_fingerprint(content)}{extension}'
+        path = os.path.join(static_dir, built)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(content)
+
+        manifest['files'][source] = built
+        if extension in COMPRESSIBLE:
+            encodings = _write_variants(path, content)
+            if encodings:
+                manifest['encodings'][built] = encodings
+
+    with open(os.path.join(output_dir, 'manifest.json'), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2, ensure_ascii=False)
+    return manifest
+
+
+def load_manifest(path: str = MANIFEST_PATH) -> dict:
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {'files': {}, 'encodings': {}}
+
+
+manifest = load_manifest()
+
+
+def asset(path: str) -> str:
+    """URL статического файла для шаблонов: собранный файл, если он есть, иначе исходный."""
+    return f"{STATIC_URL}/{manifest['files'].get(path, path)}"
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    """Кодировки из Accept-Encoding, кроме явно запрещённых через q=0."""
+    accepted = set()
+    for part in header.split(','):
+        encoding, *params = part.split(';')
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(encoding.strip().lower())
+    return accepted
+
+
+class AssetFiles(StaticFiles):
+    """
+    StaticFiles для собранных файлов: долгий кэш для имён с хэшем
+    и выбор заранее сжатого варианта по Accept-Encoding.
+    """
+
+    async def get_response(self, path: str, scope: Scope):
+        path = path.replace(os.sep, '/')
+        if not path.startswith(f'{BUILD_DIR}/'):
+            response = await super().get_response(path, scope)
+            # Исходные имена не меняются при изменении файла, браузер должен перепроверять их
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        encoding = self._pick_encoding(path, Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is None:
+            response = await super().get_response(path, scope)
+        else:
+            suffix = '.br' if encoding == 'br' else '.gz'
+            response = await super().get_response(path + suffix, scope)
+            response.headers['Content-Encoding'] = encoding
+            response.headers['Content-Type'] = self._media_type(path)
+
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
+
+    @staticmethod
+    def _pick_encoding(path: str, accept_encoding: str) -> Optional[str]:
+        available = manifest['encodings'].get(path)
+        if not available:
+            return None
+        accepted = _accepted_encodings(accept_encoding)
+        return next((encoding for encoding in available if encoding in accepted), None)
+
+    @staticmethod
+    def _media_type(path: str) -> str:
+        media_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        return f'{media_type}; charset=utf-8' if media_type.startswith('text/') else media_type
+
+
+if __name__ == '__main__':
+    if brotli is None:
+        print("Пакет brotli не установлен: варианты .br не собираются, раздаётся только gzip")
+    result = build()
+    print(f"Собрано файлов: {len(result['files'])}, сжатых: {len(result['encodings'])}")
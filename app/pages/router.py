@@ -1,14 +1,25 @@
 import logging
+from typing import Any, Awaitable, Callable, Optional
 
-from fastapi import APIRouter, HTTPException
-from fastapi.requests import Request
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+from sqlalchemy.exc import SQLAlchemyError
 
-from app.api.dao import UserDAO
+from app.api.dao import UserDAO, EventDAO, ContractorDAO, ContractorCategoryDAO
+from app.database.db import get_unit_of_work
+from app.pages.templates import render_page, warm_templates
 
-router = APIRouter(prefix='', tags=['Фронтенд'])
-templates = Jinja2Templates(directory='app/templates')
+router = APIRouter(prefix='', tags=['Фронтенд'], dependencies=[Depends(get_unit_of_work)])
+
+# Страницы WebApp: путь -> (шаблон, заголовок, описание)
+PAGES = {
+    '/events': ('events.html', 'Мои мероприятия', 'Получение страницы с мероприятиями пользователя'),
+    '/contractors': ('contractors.html', 'Список подрядчиков', 'Получение страницы с подрядчиками'),
+    '/tasks': ('tasks.html', 'Мои мероприятия', 'Получение страницы с задачами мероприятий'),
+    '/checklists': ('checklists.html', 'Мои мероприятия', 'Получение страницы с чек-листами'),
+}
+NOT_FOUND_MESSAGE = 'Пользователь не найден или не указан'
+ERROR_MESSAGE = 'Произошла ошибка при загрузке данных'
 
 
 async def get_user_or_error(user_id: int):
@@ -22,158 +33,66 @@ async def get_user_or_error(user_id: int):
     return user
 
 
-@router.get('/events', response_class=HTMLResponse)
-async def get_events_page(request: Request, user_id: int):
-    """Получение страницы с мероприятиями пользователя"""
-    template = 'events.html'
-    try:
-        user = await get_user_or_error(user_id)
-
-        return templates.TemplateResponse(
-            template,
-            {
-                'request': request,
-                'access': True,
-                'title_h1': 'Мои мероприятия',
-                'user_id': user.id
-            }
-        )
-
-    except HTTPException:
-        return templates.TemplateResponse(
-            template,
-            {
-                'request': request,
-                'access': False,
-                'title_h1': 'Мои мероприятия',
-                'message': 'Пользователь не найден или не указан'
-            }
-        )
-    except Exception as e:
-        logging.error(f'Error in events endpoint: {str(e)}')
-        return templates.TemplateResponse(
-            template,
-            {
-                'request': request,
-                'access': False,
-                'title_h1': 'Мои мероприятия',
-                'message': 'Произошла ошибка при загрузке данных'
-            }
-        )
-
-
-@router.get('/contractors', response_class=HTMLResponse)
-async def get_contractors_page(request: Request, user_id: int):
-    """Получение страницы с подрядчиками"""
-    template = 'contractors.html'
-    try:
-        user = await get_user_or_error(user_id)
-        return templates.TemplateResponse(
-            template,
-            {
-                'request': request,
-                'access': True,
-                'title_h1': 'Список подрядчиков',
-                'user_id': user.id
-            }
-        )
-
-    except HTTPException:
-        return templates.TemplateResponse(
-            template,
-            {
-                'request': request,
-                'access': False,
-                'title_h1': 'Список подрядчиков',
-                'message': 'Пользователь не найден или не указан'
-            }
-        )
-    except Exception as e:
-        logging.error(f'Error in contractors endpoint: {str(e)}')
-        return templates.TemplateResponse(
-            template,
-            {
-                'request': request,
-                'access': False,
-                'title_h1': 'Список подрядчиков',
-                'message': 'Произошла ошибка при загрузке данных'
-            }
-        )
-
-
-@router.get('/tasks', response_class=HTMLResponse)
-async def get_tasks_page(request: Request, user_id: int):
-    """Получение страницы с мероприятиями пользователя"""
-    template = 'tasks.html'
-    try:
-        user = await get_user_or_error(user_id)
-        return templates.TemplateResponse(
-            template,
-            {
-                'request': request,
-                'access': True,
-                'title_h1': 'Мои мероприятия',
-                'user_id': user.id
-            }
-        )
-
-    except HTTPException:
-        return templates.TemplateResponse(
-            template,
-            {
-                'request': request,
-                'access': False,
-                'title_h1': 'Мои мероприятия',
-                'message': 'Пользователь не найден или не указан'
-            }
-        )
-    except Exception as e:
-        logging.error(f'Error in tasks endpoint: {str(e)}')
-        return templates.TemplateResponse(
-            template,
-            {
-                'request': request,
-                'access': False,
-                'title_h1': 'Мои мероприятия',
-                'message': 'Произошла ошибка при загрузке данных'
-            }
-        )
-
-
-@router.get('/checklists', response_class=HTMLResponse)
-async def get_checklists_page(request: Request, user_id: int):
-    """Получение страницы с мероприятиями пользователя"""
-    template = 'checklists.html'
+async def _events_data(owner_id: int) -> dict[str, Any]:
+    return {'events': await EventDAO.find_all(owner_id=owner_id)}
+
+
+async def _contractors_data(owner_id: int) -> dict[str, Any]:
+    # Запросы идут по очереди: в единице работы они всё равно делят одну сессию
+    categories = await ContractorCategoryDAO.find_all(owner_id=owner_id)
+    contractors = await ContractorDAO.find_all(owner_id=owner_id)
+    return {'categories': categories, 'contractors': contractors}
+
+
+# Начальные данные, встраиваемые в страницу: скрипт страницы не делает первый запрос к API
+BOOTSTRAP: dict[str, Callable[[int], Awaitable[dict[str, Any]]]] = {
+    '/events': _events_data,
+    '/contractors': _contractors_data,
+}
+
+
+async def _load_bootstrap(path: str, owner_id: int) -> Optional[dict[str, Any]]:
+    loader = BOOTSTRAP.get(path)
+    if loader is None:
+        return None
     try:
-        user = await get_user_or_error(user_id)
-        return templates.TemplateResponse(
-            template,
-            {
-                'request': request,
-                'access': True,
-                'title_h1': 'Мои мероприятия',
-                'user_id': user.id
-            }
-        )
-
-    except HTTPException:
-        return templates.TemplateResponse(
-            template,
-            {
-                'request': request,
-                'access': False,
-                'title_h1': 'Мои мероприятия',
-                'message': 'Пользователь не найден или не указан'
-            }
-        )
-    except Exception as e:
-        logging.error(f'Error in checklists endpoint: {str(e)}')
-        return templates.TemplateResponse(
-            template,
-            {
-                'request': request,
-                'access': False,
-                'title_h1': 'Мои мероприятия',
-                'message': 'Произошла ошибка при загрузке данных'
-            }
-        )
+        return await loader(owner_id)
+    except SQLAlchemyError as e:
+        # Без встроенных данных страница загрузит их сама через API
+        logging.error(f'Error loading {path.lstrip("/")} page data: {str(e)}')
+        return None
+
+
+def _page_endpoint(path: str, template: str, title: str, description: str):
+    async def endpoint(user_id: int, bootstrap: bool = True):
+        try:
+            user = await get_user_or_error(user_id)
+            data = await _load_bootstrap(path, user.id) if bootstrap else None
+            return HTMLResponse(render_page(template, title, access=True, user_id=user.id, data=data))
+        except HTTPException:
+            return HTMLResponse(render_page(template, title, access=False, message=NOT_FOUND_MESSAGE))
+        except Exception as e:
+            logging.error(f'Error in {path.lstrip("/")} endpoint: {str(e)}')
+            return HTMLResponse(render_page(template, title, access=False, message=ERROR_MESSAGE))
+
+    endpoint.__name__ = f'get_{path.lstrip("/")}_page'
+    endpoint.__doc__ = description
+    return endpoint
+
+
+for page_path, (page_template, page_title, page_description) in PAGES.items():
+    router.add_api_route(
+        page_path,
+        _page_endpoint(page_path, page_template, page_title, page_description),
+        methods=['GET'],
+        response_class=HTMLResponse
+    )
+
+
+def warm_pages() -> None:
+    """Компилирует шаблоны и рендерит неизменяемые части всех страниц при старте приложения."""
+    warm_templates()
+    for template, title, _ in PAGES.values():
+        render_page(template, title, access=True)
+        render_page(template, title, access=False, message=NOT_FOUND_MESSAGE)
+        render_page(template, title, access=False, message=ERROR_MESSAGE)
@@ -0,0 +1,70 @@
+import json
+import re
+from functools import lru_cache
+from typing import Any, Optional
+
+from fastapi.encoders import jsonable_encoder
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+from app.pages.assets import asset
+
+TEMPLATES_DIR = 'app/templates'
+environment = Environment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    # Скомпилированные шаблоны переживают перезапуск процесса. Каталог по умолчанию
+    # создаётся для текущего пользователя с правами 0700, его владелец проверяется
+    bytecode_cache=FileSystemBytecodeCache(),
+    autoescape=select_autoescape(),
+    # Шаблоны меняются только с деплоем, проверять mtime на каждый запрос не нужно
+    auto_reload=False
+)
+environment.globals['asset'] = asset
+
+# Места для данных, которые меняются от запроса к запросу: ID пользователя и начальные данные страницы
+_SLOT = '\x00{}\x00'
+_SLOT_PATTERN = re.compile('\x00(\\w+)\x00')
+
+
+@lru_cache(maxsize=None)
+def _page_parts(template: str, title: str, access: bool, message: Optional[str]) -> tuple[str, ...]:
+    html = environment.get_template(template).render(
+        access=access,
+        title_h1=title,
+        message=message,
+        user_id=_SLOT.format('user_id'),
+        bootstrap=_SLOT.format('bootstrap')
+    )
+    # Чётные элементы - готовый HTML, нечётные - имена мест для подстановки
+    return tuple(_SLOT_PATTERN.split(html))
+
+
+def _script_json(data: Any) -> str:
+    """JSON, безопасный для вставки внутрь <script>."""
+    text = json.dumps(jsonable_encoder(data), ensure_ascii=False, separators=(',', ':'))
+    for char, escaped in (('<', '\\u003c'), ('>', '\\u003e'), ('&', '\\u0026'),
+                          ('\u2028', '\\u2028'), ('\u2029', '\\u2029')):
+        text = text.replace(char, escaped)
+    return text
+
+
+def render_page(template: str, title: str, access: bool, user_id: Optional[int] = None,
+                message: Optional[str] = None, data: Any = None) -> str:
+    """
+    Возвращает HTML страницы WebApp.
+
+    Страница рендерится один раз на сочетание (шаблон, доступ, сообщение),
+    в запросе в готовый HTML подставляются только ID пользователя
+    и начальные данные страницы (data, в виде JSON).
+    """
+    values = {
+        'user_id': str(user_id) if user_id is not None else '',
+        'bootstrap': _script_json(data)
+    }
+    parts = _page_parts(template, title, access, message)
+    return ''.join(part if index % 2 == 0 else values[part] for index, part in enumerate(parts))
+
+
+def warm_templates() -> None:
+    """Компилирует все шаблоны заранее, чтобы первый запрос после деплоя не ждал компиляции."""
+    for name in environment.list_templates(extensions=['html']):
+        environment.get_template(name)
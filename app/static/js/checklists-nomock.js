@@ -68,7 +68,7 @@ document.addEventListener('DOMContentLoaded', function() {
     const checklistItemsContainer = document.getElementById('checklist-items-container');
     const newChecklistItemTextInput = document.getElementById('new-checklist-item-text');
     const addChecklistItemBtn = document.getElementById('add-checklist-item-btn');
-    const userId = document.getElementById('user-id');
+    const userId = document.getElementById('user-id')?.value;
 
     // Action buttons
     const exportBtn = document.getElementById('export-btn');
@@ -105,6 +105,33 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    // Мероприятия и чек-листы для первой отрисовки одним запросом к /api/batch
+    async function fetchEventsAndChecklists() {
+        try {
+            const params = { owner_id: userId };
+            const response = await fetch('api/batch', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    requests: [
+                        { path: '/api/events', params },
+                        { path: '/api/checklists', params }
+                    ]
+                })
+            });
+            if (!response.ok) throw new Error('Ошибка загрузки данных');
+            const [eventsResponse, checklistsResponse] = (await response.json()).responses;
+            if (eventsResponse.status !== 200 || checklistsResponse.status !== 200) {
+                throw new Error('Ошибка загрузки данных');
+            }
+            events = eventsResponse.body;
+            checklists = checklistsResponse.body;
+        } catch (error) {
+            console.error('Failed to fetch events and checklists:', error);
+            showToast('Не удалось загрузить данные', 'error');
+        }
+    }
+
     async function fetchChecklistById(id) {
         try {
             const response = await fetch(`api/checklists/${id}`);
@@ -184,7 +211,6 @@ document.addEventListener('DOMContentLoaded', function() {
 
     async function populateEventFilters() {
         try {
-            await fetchEvents();
             eventFilter.innerHTML = '<option value="all">Все мероприятия</option>';
             events.forEach(event => {
                 const option = document.createElement('option');
@@ -216,10 +242,10 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
-    async function renderChecklists() {
+    async function renderChecklists(refresh = true) {
         try {
             checklistList.innerHTML = '';
-            await fetchChecklists();
+            if (refresh) await fetchChecklists();
 
             const eventId = eventFilter.value;
             const status = statusFilter.value;
@@ -397,7 +423,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // --- EVENT LISTENERS ---
     [eventFilter, statusFilter, periodFilter].forEach(filter => {
-        filter.addEventListener('change', renderChecklists);
+        filter.addEventListener('change', () => renderChecklists());
     });
 
     addItemBtn.addEventListener('click', () => {
@@ -502,7 +528,9 @@ document.addEventListener('DOMContentLoaded', function() {
     window.addEventListener('resize', handleResize);
 
     // --- INITIAL RENDER ---
-    populateEventFilters();
-    renderChecklists();
+    fetchEventsAndChecklists().then(() => {
+        populateEventFilters();
+        renderChecklists(false);
+    });
     handleResize(); // Initial check on load
 });
\ No newline at end of file
@@ -25,6 +25,8 @@ document.addEventListener('DOMContentLoaded', () => {
     const itemContactInput = $('item-contact');
     const itemUserId = $('user-id');
     const toast = $('toast');
+    // Начальные данные, встроенные сервером в страницу (null, если их нет)
+    const bootstrapData = JSON.parse($('bootstrap-data')?.textContent || 'null');
 
     // --- HELPERS ---
     const showToast = (message, type = 'success') => {
@@ -38,20 +40,6 @@ document.addEventListener('DOMContentLoaded', () => {
         if (addBtnText) addBtnText.style.display = window.innerWidth <= 400 ? 'none' : 'inline';
     };
 
-    const fetchCategories = async () => {
-        try {
-            const res = await fetch(`/api/contractor-categories?owner_id=${itemUserId.value}`);
-            if (!res.ok) throw new Error('Ошибка загрузки категорий');
-            const data = await res.json();
-            serverCategories = data;  // [{id, title}, ...]
-            renderCategories();
-            populateCategorySelect();
-        } catch (err) {
-            console.error(err);
-            showToast('Ошибка загрузки категорий', 'error');
-        }
-    };
-
     const fetchContractors = async (categoryId = 'all') => {
         console.log('Rendering contractors:', serverContractors);
         try {
@@ -70,6 +58,35 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     };
 
+    // Категории и подрядчики одним запросом к /api/batch
+    const fetchCategoriesAndContractors = async (categoryId = 'all') => {
+        try {
+            const params = { owner_id: itemUserId.value };
+            const contractorParams = categoryId !== 'all' ? { ...params, category: categoryId } : params;
+            const res = await fetch('/api/batch', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    requests: [
+                        { path: '/api/contractor-categories', params },
+                        { path: '/api/contractors', params: contractorParams }
+                    ]
+                })
+            });
+            if (!res.ok) throw new Error('Ошибка загрузки данных');
+            const [categories, contractors] = (await res.json()).responses;
+            if (categories.status !== 200 || contractors.status !== 200) throw new Error('Ошибка загрузки данных');
+            serverCategories = categories.body;
+            renderCategories();
+            populateCategorySelect();
+            serverContractors = contractors.body;
+            renderItems();
+        } catch (err) {
+            console.error(err);
+            showToast('Ошибка загрузки данных', 'error');
+        }
+    };
+
     const populateCategorySelect = () => {
         itemCategoryInput.innerHTML = serverCategories.length
             ? serverCategories.map(cat => `<option value="${cat.id}">${cat.title}</option>`).join('')
@@ -206,10 +223,8 @@ document.addEventListener('DOMContentLoaded', () => {
                 }
 
                 showToast('Категория удалена');
-                await fetchCategories();
-
                 if (currentCategory === cat) currentCategory = 'all';
-                await fetchContractors(currentCategory);
+                await fetchCategoriesAndContractors(currentCategory);
 
             } catch (err) {
                 console.error(err);
@@ -249,11 +264,11 @@ document.addEventListener('DOMContentLoaded', () => {
 
             showToast('Категория добавлена!');
             newCategoryNameInput.value = '';
-            await fetchCategories();
 
-            // Выставим текущую категорию как новую последнюю
-            currentCategory = serverCategories.length ? String(serverCategories[serverCategories.length - 1].id) : 'all';
-            await fetchContractors(currentCategory);
+            // Новая категория становится текущей; категории и подрядчики загружаются одним запросом
+            const category = await response.json();
+            currentCategory = String(category.id);
+            await fetchCategoriesAndContractors(currentCategory);
 
         } catch (err) {
             showToast('Ошибка сети', 'error');
@@ -318,10 +333,17 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
-    // Загрузка при старте
+    // Загрузка при старте: из встроенных данных, если сервер их передал
     (async () => {
-        await fetchCategories();
-        await fetchContractors(currentCategory);
+        if (bootstrapData?.categories && bootstrapData?.contractors) {
+            serverCategories = bootstrapData.categories;
+            renderCategories();
+            populateCategorySelect();
+            serverContractors = bootstrapData.contractors;
+            renderItems();
+        } else {
+            await fetchCategoriesAndContractors(currentCategory);
+        }
         handleResize();
     })();
 });
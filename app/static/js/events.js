@@ -21,6 +21,9 @@ document.addEventListener('DOMContentLoaded', function() {
     // Toast element
     const toast = document.getElementById('toast');
 
+    // Начальные данные, встроенные сервером в страницу (null, если их нет)
+    const bootstrapData = JSON.parse(document.getElementById('bootstrap-data')?.textContent || 'null');
+
     // --- FLATPICKR INITIALIZATION ---
     const fp = flatpickr("#date", {
         locale: "ru",
@@ -252,6 +255,11 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 
     // --- INITIAL RENDER ---
-    fetchEvents();
+    if (bootstrapData?.events) {
+        serverEvents = bootstrapData.events;
+        renderEvents(serverEvents);
+    } else {
+        fetchEvents();
+    }
     handleResize();
 });
@@ -0,0 +1,120 @@
+"""
+Потоковое чтение листов XLSX без сторонних библиотек.
+"""
+import posixpath
+import zipfile
+from typing import Iterator, Optional
+from xml.etree import ElementTree
+from xml.parsers import expat
+
+
+def _local_name(tag: str) -> str:
+    return tag.rpartition('}')[2].rpartition(':')[2]
+
+
+def _column_index(ref: str) -> int:
+    """Номер столбца (с нуля) по адресу ячейки вида «AB12»."""
+    index = 0
+    for char in ref:
+        if char.isdigit():
+            break
+        index = index * 26 + ord(char) - 64
+    return index - 1
+
+
+class XlsxRowReader:
+    """
+    Потоковое чтение листа XLSX парсером expat без построения дерева и объектов ячеек.
+
+    Читается лист sheet_name (None - первый лист книги). Значения берутся только
+    из столбцов wanted (None - из всех), поэтому после разбора заголовка
+    лишние столбцы пропускаются без обработки.
+    """
+
+    def __init__(self, archive: zipfile.ZipFile, sheet_name: Optional[str] = None):
+        self.archive = archive
+        self.sheet_path = self._sheet_path(sheet_name)
+        self.wanted: Optional[set[int]] = None
+        self._shared: Optional[list[str]] = None
+
+    def _sheet_path(self, sheet_name: str) -> str:
+        workbook = ElementTree.fromstring(self.archive.read('xl/workbook.xml'))
+        relation_id = None
+        for sheet in workbook.iter():
+            # Без имени берётся первый лист книги
+            if _local_name(sheet.tag) == 'sheet' and sheet_name in (None, sheet.get('name')):
+                relation_id = next(value for key, value in sheet.attrib.items() if _local_name(key) == 'id')
+                break
+        if relation_id is None:
+            raise ValueError(f"В таблице нет листа «{sheet_name}»")
+
+        relations = ElementTree.fromstring(self.archive.read('xl/_rels/workbook.xml.rels'))
+        target = next(rel.get('Target') for rel in relations if rel.get('Id') == relation_id)
+        return target.lstrip('/') if target.startswith('/') else posixpath.normpath(f'xl/{target}')
+
+    def _shared_string(self, index: str) -> str:
+        if self._shared is None:
+            self._shared = []
+            if 'xl/sharedStrings.xml' in self.archive.namelist():
+                for _, element in ElementTree.iterparse(self.archive.open('xl/sharedStrings.xml')):
+                    if _local_name(element.tag) == 'si':
+                        self._shared.append(''.join(
+                            node.text or '' for node in element.iter() if _local_name(node.tag) == 't'
+                        ))
+                        element.clear()
+        return self._shared[int(index)]
+
+    def _convert(self, cell_type: Optional[str], text: str):
+        if cell_type == 's':
+            return self._shared_string(text)
+        if cell_type in ('inlineStr', 'str'):
+            return text
+        if cell_type == 'e' or text == '':
+            return None
+        return text
+
+    def __iter__(self) -> Iterator[dict[int, object]]:
+        rows: list[dict[int, object]] = []
+        row: dict[int, object] = {}
+        cell = {'column': None, 'type': None, 'text': None, 'in_value': False}
+
+        def start(tag, attrs):
+            name = _local_name(tag)
+            if name == 'c':
+                column = _column_index(attrs.get('r', ''))
+                wanted = self.wanted is None or column in self.wanted
+                cell['column'] = column if wanted else None
+                cell['type'] = attrs.get('t')
+                cell['text'] = []
+            elif name in ('v', 't') and cell['column'] is not None:
+                cell['in_value'] = True
+            elif name == 'row':
+                row.clear()
+
+        def end(tag):
+            name = _local_name(tag)
+            if name in ('v', 't'):
+                cell['in_value'] = False
+            elif name == 'c' and cell['column'] is not None:
+                row[cell['column']] = self._convert(cell['type'], ''.join(cell['text']))
+                cell['column'] = None
+            elif name == 'row':
+                rows.append(dict(row))
+
+        def characters(data):
+            if cell['in_value']:
+                cell['text'].append(data)
+
+        parser = expat.ParserCreate()
+        parser.StartElementHandler = start
+        parser.EndElementHandler = end
+        parser.CharacterDataHandler = characters
+        parser.buffer_text = True
+
+        with self.archive.open(self.sheet_path) as sheet:
+            while chunk := sheet.read(1 << 16):
+                parser.Parse(chunk, False)
+                yield from rows
+                rows.clear()
+            parser.Parse(b'', True)
+            yield from rows
@@ -0,0 +1,74 @@
+"""
+Скорость и память потоковой выгрузки (app.api.exporter) на временной БД.
+
+Для каждого размера из --rows заполняет таблицу мероприятий и выгружает её
+в CSV и XLSX, отбрасывая полученные части. Пик памяти Python (tracemalloc)
+не должен зависеть от числа строк; время замеряется под tracemalloc
+и поэтому завышено в несколько раз.
+
+Запуск из корня репозитория:
+    python benchmarks/export.py --rows 10000 100000
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def run(args: argparse.Namespace) -> None:
+    from app.api.dao import UserDAO, EventDAO
+    from app.api.exporter import export_rows
+    from app.database.db import Base, engine
+    from app.database.writer import write_queue
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    user = await UserDAO.add(telegram_id=1, name='benchmark')
+
+    filled = 0
+    for rows in sorted(args.rows):
+        for start in range(filled, rows, 1000):
+            await EventDAO.add_many([
+                {'owner_id': user.id, 'title': f'Мероприятие {index}',
+                 'date': datetime.date(2024, 1, 1) + datetime.timedelta(days=index % 365),
+                 'location': f'Площадка {index % 100}'}
+                for index in range(start, min(start + 1000, rows))
+            ])
+        filled = rows
+
+        for file_format in ('csv', 'xlsx'):
+            size = 0
+            tracemalloc.start()
+            started = time.perf_counter()
+            async for chunk in export_rows('events', user.id, file_format):
+                size += len(chunk)
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f'{rows:>8} строк  {file_format:<4}  {elapsed:6.2f} с  {rows / elapsed:>9,.0f} строк/с  '
+                  f'файл {size / 1024 / 1024:6.1f} МБ  пик памяти {peak / 1024 / 1024:5.1f} МБ')
+
+    await write_queue.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000], help='размеры выгрузки')
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    with tempfile.TemporaryDirectory() as directory:
+        # Путь к БД в app.database.db относительный: временная БД создаётся в app/ рабочего каталога
+        os.makedirs(os.path.join(directory, 'app'))
+        os.chdir(directory)
+        asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Скорость импорта подрядчиков из CSV (app.api.importer) на временной БД.
+
+Генерирует файл на --rows строк (50 категорий, каждая сотая строка - повтор),
+импортирует его пачками и сравнивает с прежним путём POST /api/contractors:
+поиск дубликата по всем полям и отдельный add на каждую строку
+(замеряется на --baseline строках).
+
+Запуск из корня репозитория:
+    python benchmarks/import_contractors.py --rows 100000
+"""
+import argparse
+import asyncio
+import csv
+import os
+import resource
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_csv(path: str, rows: int) -> None:
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['Название', 'Категория', 'Контакты'])
+        for index in range(rows):
+            number = index - 1 if index % 100 == 99 else index
+            writer.writerow([f'Подрядчик {number}', f'Категория {number % 50}', f'+7 900 {number:07d}'])
+
+
+async def run(args: argparse.Namespace, path: str) -> None:
+    from app.api.dao import UserDAO, ContractorDAO, ContractorCategoryDAO
+    from app.api.importer import import_file
+    from app.database.db import Base, engine
+    from app.database.writer import write_queue
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    user = await UserDAO.add(telegram_id=1, name='benchmark')
+
+    started = time.perf_counter()
+    with open(path, 'rb') as file:
+        stats = await import_file('contractors', file, 'csv', user.id,
+                                  progress=lambda s: print(f'\r  строк: {s.rows}', end='', flush=True))
+    elapsed = time.perf_counter() - started
+    print(f'\rimport     {stats.rows} строк за {elapsed:.2f} с ({stats.rows / elapsed:,.0f} строк/с), '
+          f'добавлено {stats.inserted}, дубликатов {stats.duplicates}, категорий {stats.categories_created}')
+
+    if args.baseline:
+        other = await UserDAO.add(telegram_id=2, name='baseline')
+        category = await ContractorCategoryDAO.add(owner_id=other.id, title='Категория')
+        started = time.perf_counter()
+        for index in range(args.baseline):
+            data = {'name': f'Подрядчик {index}', 'category_id': category.id,
+                    'contact': f'+7 900 {index:07d}', 'owner_id': other.id}
+            if await ContractorDAO.find_one_or_none(**data) is None:
+                await ContractorDAO.add(**data)
+        elapsed = time.perf_counter() - started
+        print(f'per-row    {args.baseline} строк за {elapsed:.2f} с ({args.baseline / elapsed:,.0f} строк/с)')
+
+    await write_queue.stop()
+    print(f'peak RSS   {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} МБ')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000, help='строк в файле')
+    parser.add_argument('--baseline', type=int, default=1000, help='строк для замера прежнего пути; 0 - без него')
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    with tempfile.TemporaryDirectory() as directory:
+        # Путь к БД в app.database.db относительный: временная БД создаётся в app/ рабочего каталога
+        os.makedirs(os.path.join(directory, 'app'))
+        os.chdir(directory)
+        path = os.path.join(directory, 'contractors.csv')
+        write_csv(path, args.rows)
+        print(f'file       {os.path.getsize(path) / 1024 / 1024:.1f} МБ')
+        asyncio.run(run(args, path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Чтение списков проекцией столбцов против ORM-сущностей на временной БД.
+
+Для каждого размера из --rows заполняет таблицы подрядчиков и мероприятий
+одного пользователя и сравнивает:
+  - contractors: ContractorDAO.get_contractors_by_user (проекция с JOIN категорий)
+    и прежний путь - select(Contractor, ContractorCategory.title) с копированием
+    полей объектов в словари;
+  - events: EventDAO.find_projection и EventDAO.find_all с тем же копированием.
+Берётся лучшее время из --repeat прогонов.
+
+Запуск из корня репозитория:
+    python benchmarks/projection.py --rows 10000 100000
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EVENT_FIELDS = ('id', 'title', 'date', 'location', 'owner_id')
+
+
+async def contractors_orm(owner_id: int) -> list[dict]:
+    from sqlalchemy import select
+    from app.database.db import session_scope
+    from app.database.models import Contractor, ContractorCategory
+
+    async with session_scope() as session:
+        query = (
+            select(Contractor, ContractorCategory.title)
+            .join(ContractorCategory, Contractor.category_id == ContractorCategory.id)
+            .where(Contractor.owner_id == owner_id)
+            .order_by(Contractor.name)
+        )
+        result = await session.execute(query)
+        return [
+            {'id': contractor.id, 'name': contractor.name, 'category': title,
+             'contact': contractor.contact, 'owner_id': contractor.owner_id}
+            for contractor, title in result.all()
+        ]
+
+
+async def events_orm(owner_id: int) -> list[dict]:
+    from app.api.dao import EventDAO
+
+    return [
+        {field: getattr(event, field) for field in EVENT_FIELDS}
+        for event in await EventDAO.find_all(owner_id=owner_id)
+    ]
+
+
+async def best_of(repeat: int, call) -> tuple[float, int]:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = await call()
+        best = min(best, time.perf_counter() - started)
+    return best, len(rows)
+
+
+async def fill(owner_id: int, start: int, stop: int, categories: list[int]) -> None:
+    from app.api.dao import ContractorDAO, EventDAO
+
+    for offset in range(start, stop, 1000):
+        indexes = range(offset, min(offset + 1000, stop))
+        await ContractorDAO.add_many([
+            {'owner_id': owner_id, 'category_id': categories[index % len(categories)],
+             'name': f'Подрядчик {index:06d}', 'contact': f'+7 900 {index:07d}'}
+            for index in indexes
+        ])
+        await EventDAO.add_many([
+            {'owner_id': owner_id, 'title': f'Мероприятие {index}',
+             'date': datetime.date(2024, 1, 1) + datetime.timedelta(days=index % 365),
+             'location': f'Площадка {index % 100}'}
+            for index in indexes
+        ])
+
+
+async def run(args: argparse.Namespace) -> None:
+    from app.api.dao import ContractorCategoryDAO, ContractorDAO, EventDAO, UserDAO
+    from app.database.db import Base, engine
+    from app.database.writer import write_queue
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    user = await UserDAO.add(telegram_id=1, name='benchmark')
+    categories = [
+        (await ContractorCategoryDAO.add(owner_id=user.id, title=f'Категория {index}')).id
+        for index in range(20)
+    ]
+
+    filled = 0
+    for rows in sorted(args.rows):
+        await fill(user.id, filled, rows, categories)
+        filled = rows
+
+        cases = (
+            ('contractors', lambda: contractors_orm(user.id),
+             lambda: ContractorDAO.get_contractors_by_user(user.id)),
+            ('events', lambda: events_orm(user.id),
+             lambda: EventDAO.find_projection(*EVENT_FIELDS, owner_id=user.id)),
+        )
+        for name, orm, projection in cases:
+            orm_time, orm_rows = await best_of(args.repeat, orm)
+            projection_time, projection_rows = await best_of(args.repeat, projection)
+            assert orm_rows == projection_rows == rows
+            print(f'{rows:>8} строк  {name:<12}  ORM {orm_time * 1000:8.0f} мс  '
+                  f'проекция {projection_time * 1000:8.0f} мс  x{orm_time / projection_time:4.1f}')
+
+    await write_queue.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000], help='размеры списков')
+    parser.add_argument('--repeat', type=int, default=3, help='прогонов на замер')
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    with tempfile.TemporaryDirectory() as directory:
+        # Путь к БД в app.database.db относительный: временная БД создаётся в app/ рабочего каталога
+        os.makedirs(os.path.join(directory, 'app'))
+        os.chdir(directory)
+        asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Загрузка пунктов чек-листов: запрос на каждый чек-лист (N+1) против
+пакетной загрузки через RelationLoader (app.api.loader) на временной БД.
+
+Для каждого числа чек-листов из --checklists (по --items пунктов в каждом)
+повторяет то, что делает GET /api/checklists, в своей единице работы:
+  - n+1:        ChecklistItemDAO.find_all(checklist_id=...) для каждого чек-листа;
+  - load_many:  ChecklistItemDAO.load_many_by('checklist_id', ids);
+  - load_by:    ChecklistItemDAO.load_by для каждого чек-листа через asyncio.gather,
+                как при загрузке из независимых обработчиков.
+Считаются SQL-запросы к БД; берётся лучшее время из --repeat прогонов.
+
+Запуск из корня репозитория:
+    python benchmarks/relation_loader.py --checklists 50 200 1000 --items 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Служебные команды транзакций не считаются запросами
+SKIPPED_PREFIXES = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'PRAGMA')
+
+
+@contextmanager
+def counted_queries():
+    """Считает запросы к обоим движкам внутри блока."""
+    from sqlalchemy import event
+    from app.database.db import engine, read_engine
+
+    counter = [0]
+
+    def listener(connection, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(SKIPPED_PREFIXES):
+            counter[0] += 1
+
+    engines = (engine.sync_engine, read_engine.sync_engine)
+    for target in engines:
+        event.listen(target, 'before_cursor_execute', listener)
+    try:
+        yield counter
+    finally:
+        for target in engines:
+            event.remove(target, 'before_cursor_execute', listener)
+
+
+async def n_plus_one(ids: list[int]) -> list[list]:
+    from app.api.dao import ChecklistItemDAO
+
+    return [await ChecklistItemDAO.find_all(checklist_id=checklist_id) for checklist_id in ids]
+
+
+async def load_many(ids: list[int]) -> list[list]:
+    from app.api.dao import ChecklistItemDAO
+
+    return await ChecklistItemDAO.load_many_by('checklist_id', ids)
+
+
+async def load_by(ids: list[int]) -> list[list]:
+    from app.api.dao import ChecklistItemDAO
+
+    return list(await asyncio.gather(
+        *(ChecklistItemDAO.load_by('checklist_id', checklist_id) for checklist_id in ids)
+    ))
+
+
+async def measure(repeat: int, strategy, owner_id: int) -> tuple[float, int, int]:
+    from app.api.dao import ChecklistDAO
+    from app.database.db import unit_of_work
+
+    best = float('inf')
+    for _ in range(repeat):
+        with counted_queries() as queries:
+            started = time.perf_counter()
+            # Загрузчики живут в единице работы, поэтому каждый прогон начинается с пустого кэша
+            async with unit_of_work():
+                checklists = await ChecklistDAO.find_all(owner_id=owner_id)
+                items = await strategy([checklist.id for checklist in checklists])
+            best = min(best, time.perf_counter() - started)
+    return best, queries[0], sum(len(checklist_items) for checklist_items in items)
+
+
+async def run(args: argparse.Namespace) -> None:
+    from app.api.dao import ChecklistDAO, ChecklistItemDAO, UserDAO
+    from app.database.db import Base, engine
+    from app.database.writer import write_queue
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    for number, checklists in enumerate(args.checklists, start=1):
+        user = await UserDAO.add(telegram_id=number, name='benchmark')
+        created = await ChecklistDAO.add_many(
+            [{'owner_id': user.id, 'title': f'Чек-лист {index}'} for index in range(checklists)], 'id'
+        )
+        await ChecklistItemDAO.add_many([
+            {'checklist_id': checklist['id'], 'title': f'Пункт {index}'}
+            for checklist in created
+            for index in range(args.items)
+        ])
+
+        for name, strategy in (('n+1', n_plus_one), ('load_many', load_many), ('load_by', load_by)):
+            elapsed, queries, items = await measure(args.repeat, strategy, user.id)
+            assert items == checklists * args.items
+            print(f'{checklists:>6} чек-листов  {name:<10}  {elapsed * 1000:8.1f} мс  запросов {queries:>5}')
+
+    await write_queue.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checklists', type=int, nargs='+', default=[50, 200, 1000], help='числа чек-листов')
+    parser.add_argument('--items', type=int, default=5, help='пунктов в каждом чек-листе')
+    parser.add_argument('--repeat', type=int, default=3, help='прогонов на замер')
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    with tempfile.TemporaryDirectory() as directory:
+        # Путь к БД в app.database.db относительный: временная БД создаётся в app/ рабочего каталога
+        os.makedirs(os.path.join(directory, 'app'))
+        os.chdir(directory)
+        asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
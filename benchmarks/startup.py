@@ -0,0 +1,72 @@
+"""
+Замер холодного старта приложения: импорт app.main и вход в lifespan.
+
+Каждый замер выполняется в новом интерпретаторе, результатом считается медиана.
+Если медиана превышает порог, скрипт завершается с кодом 1.
+
+Запуск из корня репозитория:
+    python benchmarks/startup.py --runs 5 --max-import 8 --max-ready 10
+
+Вход в lifespan регистрирует вебхук, поэтому нужны BOT_TOKEN и доступ к Telegram;
+--import-only замеряет только импорт.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+result = {'import': imported - started}
+if not IMPORT_ONLY:
+    async def enter_lifespan():
+        async with app.main.app.router.lifespan_context(app.main.app):
+            result['ready'] = time.perf_counter() - started
+    asyncio.run(enter_lifespan())
+print(json.dumps(result))
+"""
+
+
+def measure(import_only: bool) -> dict:
+    completed = subprocess.run(
+        [sys.executable, '-c', f'IMPORT_ONLY = {import_only}\n{PROBE}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-import', type=float, default=8.0, help='порог для импорта app.main, с')
+    parser.add_argument('--max-ready', type=float, default=10.0, help='порог до готовности lifespan, с')
+    parser.add_argument('--import-only', action='store_true')
+    args = parser.parse_args()
+
+    # Первый запуск компилирует .pyc и в медиану не входит
+    measure(import_only=True)
+    samples = [measure(args.import_only) for _ in range(args.runs)]
+
+    failed = False
+    for phase, limit in (('import', args.max_import), ('ready', args.max_ready)):
+        values = [sample[phase] for sample in samples if phase in sample]
+        if not values:
+            continue
+        median = statistics.median(values)
+        status = 'ok' if median <= limit else 'REGRESSION'
+        failed |= median > limit
+        print(f'{phase:<7} median {median:.3f} s  min {min(values):.3f} s  limit {limit:.1f} s  {status}')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Скорость разбора тела вебхука в aiogram Update (апдейтов в секунду на одно ядро).
+
+Сравнивает прежний путь (json.loads -> Update(**data) -> пересоздание апдейта
+диспетчером для привязки к боту) с разбором байтов через Update.model_validate_json.
+Образцы апдейтов лежат в benchmarks/payloads.
+
+Запуск из корня репозитория:
+    python benchmarks/webhook_decode.py --seconds 2
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+from aiogram import Bot
+from aiogram.types import Update
+
+PAYLOADS = Path(__file__).resolve().parent / 'payloads'
+
+bot = Bot(token='1:benchmark')
+
+
+def decode_dict(body: bytes) -> Update:
+    update = Update(**json.loads(body))
+    # Так Dispatcher.feed_update привязывает к боту апдейт, созданный без контекста
+    return Update.model_validate(update.model_dump(), context={'bot': bot})
+
+
+def decode_json(body: bytes) -> Update:
+    return Update.model_validate_json(body, context={'bot': bot})
+
+
+def rate(decode, body: bytes, seconds: float) -> float:
+    count = 0
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            decode(body)
+        count += 100
+    return count / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=2.0, help='длительность замера на образец, с')
+    args = parser.parse_args()
+
+    for path in sorted(PAYLOADS.glob('*.json')):
+        body = path.read_bytes()
+        assert decode_dict(body) == decode_json(body)
+        before = rate(decode_dict, body, args.seconds)
+        after = rate(decode_json, body, args.seconds)
+        print(f'{path.stem:<16} dict {before:>9.0f}/s  json {after:>9.0f}/s  x{after / before:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Пропускная способность записи через очередь писателя (app.database.writer) на временной БД.
+
+Для каждого числа одновременных писателей из --writers каждый писатель делает
+--writes изменений, каждое - в своей единице работы, как обработчик запроса:
+добавляет мероприятие и обновляет его. Сравнивается с прежней схемой
+(--baseline): движок с настройками по умолчанию, без WAL и очереди, каждый
+писатель фиксирует свою транзакцию сам. Записи, упавшие
+с «database is locked», считаются ошибками.
+
+Запуск из корня репозитория:
+    python benchmarks/write_queue.py --writers 50 100 200 --writes 20
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATE = datetime.date(2024, 1, 1)
+
+
+async def queue_writers(writers: int, writes: int, owner_id: int) -> tuple[int, int]:
+    from app.api.dao import EventDAO
+    from app.database.db import unit_of_work
+
+    errors = 0
+
+    async def writer(number: int) -> None:
+        nonlocal errors
+        for index in range(writes):
+            try:
+                async with unit_of_work():
+                    event = await EventDAO.add(owner_id=owner_id, title=f'Мероприятие {number}-{index}', date=DATE)
+                    await EventDAO.update(id=event.id, location=f'Площадка {index}')
+            except Exception:
+                errors += 1
+
+    await asyncio.gather(*(writer(number) for number in range(writers)))
+    return writers * writes - errors, errors
+
+
+async def baseline_writers(writers: int, writes: int, owner_id: int, url: str) -> tuple[int, int]:
+    from sqlalchemy import update
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    from app.database.models import Event
+
+    engine = create_async_engine(url)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    errors = 0
+
+    async def writer(number: int) -> None:
+        nonlocal errors
+        for index in range(writes):
+            try:
+                async with session_maker() as session:
+                    event = Event(owner_id=owner_id, title=f'Мероприятие {number}-{index}', date=DATE)
+                    session.add(event)
+                    await session.commit()
+                    await session.execute(update(Event).where(Event.id == event.id).values(location=f'Площадка {index}'))
+                    await session.commit()
+            except OperationalError:
+                errors += 1
+
+    await asyncio.gather(*(writer(number) for number in range(writers)))
+    await engine.dispose()
+    return writers * writes - errors, errors
+
+
+async def run(args: argparse.Namespace) -> None:
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from app.api.dao import UserDAO
+    from app.database.db import Base, engine
+    from app.database.writer import write_queue
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    user = await UserDAO.add(telegram_id=1, name='benchmark')
+
+    baseline_url = 'sqlite+aiosqlite:///app/baseline.sqlite3'
+    if args.baseline:
+        baseline_engine = create_async_engine(baseline_url)
+        async with baseline_engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        await baseline_engine.dispose()
+
+    for writers in args.writers:
+        batches = write_queue.batches
+        started = time.perf_counter()
+        done, errors = await queue_writers(writers, args.writes, user.id)
+        elapsed = time.perf_counter() - started
+        print(f'queue     {writers:>4} писателей  {done:>6} записей за {elapsed:6.2f} с  '
+              f'{done / elapsed:>7,.0f} записей/с  ошибок {errors:>4}  групп {write_queue.batches - batches}')
+
+        if args.baseline:
+            started = time.perf_counter()
+            done, errors = await baseline_writers(writers, args.writes, user.id, baseline_url)
+            elapsed = time.perf_counter() - started
+            print(f'baseline  {writers:>4} писателей  {done:>6} записей за {elapsed:6.2f} с  '
+                  f'{done / elapsed:>7,.0f} записей/с  ошибок {errors:>4}')
+
+    await write_queue.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, nargs='+', default=[50, 100, 200], help='числа одновременных писателей')
+    parser.add_argument('--writes', type=int, default=20, help='изменений на одного писателя')
+    parser.add_argument('--baseline', action=argparse.BooleanOptionalAction, default=True,
+                        help='замерять прежнюю схему без очереди')
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    with tempfile.TemporaryDirectory() as directory:
+        # Путь к БД в app.database.db относительный: временная БД создаётся в app/ рабочего каталога
+        os.makedirs(os.path.join(directory, 'app'))
+        os.chdir(directory)
+        asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
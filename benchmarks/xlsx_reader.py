@@ -0,0 +1,141 @@
+"""
+Сумма столбцов «Итого» и «Предоплата» по листу XLSX потоковым читателем
+(app.utils.xlsx.XlsxRowReader) на сгенерированной таблице бюджета.
+
+Для каждого размера из --rows пишет лист «Лист1» с десятью столбцами
+(exporter.XlsxStreamWriter) и считает суммы:
+  - budget:  app.bot.table.read_budget - сводка бота по таблице (суммы в копейках);
+  - pruned:  XlsxRowReader, после заголовка читаются только нужные столбцы;
+  - full:    XlsxRowReader, читаются все столбцы;
+  - pandas:  read_excel всего листа в DataFrame, как раньше (если pandas установлен;
+             --no-pandas отключает этот замер).
+Берётся лучшее время из --repeat прогонов; пик памяти Python (tracemalloc)
+замеряется отдельным прогоном.
+
+Запуск из корня репозитория:
+    python benchmarks/xlsx_reader.py --rows 50000
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHEET = 'Лист1'
+HEADER = ('№', 'Статья', 'Подрядчик', 'Контакт', 'Комментарий',
+          'Количество', 'Цена', 'Итого', 'Предоплата', 'Статус')
+
+
+def write_fixture(path: str, rows: int) -> None:
+    from app.api.exporter import XlsxStreamWriter
+
+    writer = XlsxStreamWriter(SHEET)
+    with open(path, 'wb') as file:
+        file.write(writer.write_rows([HEADER]))
+        for start in range(0, rows, 1000):
+            file.write(writer.write_rows(
+                (index + 1, f'Статья {index % 40}', f'Подрядчик {index % 300}', f'+7 900 {index:07d}',
+                 'Комментарий к строке бюджета', index % 5 + 1, 1500 + index % 1000,
+                 (index % 5 + 1) * (1500 + index % 1000), (1500 + index % 1000) // 2, 'Согласовано')
+                for index in range(start, min(start + 1000, rows))
+            ))
+        file.write(writer.close())
+
+
+def _number(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def sum_reader(path: str, prune: bool) -> tuple[float, float]:
+    from app.utils.xlsx import XlsxRowReader
+
+    total = paid = 0.0
+    with zipfile.ZipFile(path) as archive:
+        reader = XlsxRowReader(archive, SHEET)
+        rows = iter(reader)
+        header = {value: index for index, value in next(rows).items()}
+        total_index, paid_index = header['Итого'], header['Предоплата']
+        if prune:
+            reader.wanted = {total_index, paid_index}
+        for row in rows:
+            total += _number(row.get(total_index))
+            paid += _number(row.get(paid_index))
+    return total, paid
+
+
+def sum_budget(path: str) -> tuple[float, float]:
+    from app.bot.table import read_budget
+
+    summary = read_budget(path)
+    return summary.total, summary.paid
+
+
+def sum_pandas(path: str) -> tuple[float, float]:
+    import pandas
+
+    with warnings.catch_warnings():
+        # openpyxl предупреждает, что в книге нет стиля по умолчанию
+        warnings.simplefilter('ignore', UserWarning)
+        frame = pandas.read_excel(path, sheet_name=SHEET)
+    return float(frame['Итого'].sum()), float(frame['Предоплата'].sum())
+
+
+def measure(repeat: int, call) -> tuple[float, float, tuple]:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = call()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[50_000], help='строк в таблице')
+    parser.add_argument('--repeat', type=int, default=3, help='прогонов на замер')
+    parser.add_argument('--pandas', action=argparse.BooleanOptionalAction, default=True,
+                        help='замерять read_excel (медленно)')
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    cases = [
+        ('budget', sum_budget),
+        ('pruned', lambda path: sum_reader(path, True)),
+        ('full', lambda path: sum_reader(path, False)),
+    ]
+    if args.pandas:
+        try:
+            import pandas  # noqa: F401
+            cases.append(('pandas', sum_pandas))
+        except ImportError:
+            print('pandas не установлен, замер read_excel пропущен')
+
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            path = os.path.join(directory, f'budget_{rows}.xlsx')
+            write_fixture(path, rows)
+            expected = None
+            for name, call in cases:
+                elapsed, peak, result = measure(args.repeat, lambda: call(path))
+                assert expected is None or all(
+                    math.isclose(value, other, abs_tol=0.01) for value, other in zip(result, expected)
+                ), f'{name}: суммы не совпадают'
+                expected = result
+                print(f'{rows:>8} строк  {name:<7}  {elapsed * 1000:8.0f} мс  {rows / elapsed:>9,.0f} строк/с  '
+                      f'пик памяти {peak / 1024 / 1024:6.1f} МБ')
+
+
+if __name__ == '__main__':
+    main()
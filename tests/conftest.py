@@ -0,0 +1,77 @@
+"""
+Общие фикстуры тестов: временная БД со схемой из моделей.
+
+Путь к БД в app.database.db относительный (app/db.sqlite3), а SQLAlchemy
+превращает его в абсолютный при создании движка, то есть при импорте app.
+Поэтому рабочий каталог меняется на временный в pytest_configure,
+до импорта тестовых модулей.
+"""
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_cwd = os.getcwd()
+_workdir = tempfile.mkdtemp(prefix='orgbot-tests-')
+
+
+def pytest_configure(config):
+    os.makedirs(os.path.join(_workdir, 'app'), exist_ok=True)
+    # Статика и шаблоны тоже ищутся по относительным путям (app.main, app.pages.templates)
+    for name in ('static', 'templates'):
+        link = os.path.join(_workdir, 'app', name)
+        if not os.path.exists(link):
+            os.symlink(os.path.join(ROOT, 'app', name), link)
+    os.chdir(_workdir)
+
+
+def pytest_unconfigure(config):
+    os.chdir(_cwd)
+    shutil.rmtree(_workdir, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def run():
+    """
+    Выполняет корутину в новом цикле событий.
+
+    Соединения и писатель привязаны к циклу событий, поэтому после каждого
+    вызова они закрываются.
+    """
+    from app.database.db import engine, read_engine, stream_engine
+    from app.database.writer import write_queue
+
+    def run(coroutine):
+        async def main():
+            try:
+                return await coroutine
+            finally:
+                await write_queue.stop()
+                await engine.dispose()
+                await read_engine.dispose()
+                await stream_engine.dispose()
+
+        return asyncio.run(main())
+
+    return run
+
+
+@pytest.fixture(scope='session')
+def database(run):
+    """Создаёт схему БД по моделям; возвращает путь к файлу БД."""
+    # Модели регистрируются в Base.metadata при импорте DAO
+    import app.api.dao  # noqa: F401
+    from app.database.db import Base, engine
+
+    async def create():
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    run(create())
+    return os.path.join(_workdir, 'app', 'db.sqlite3')
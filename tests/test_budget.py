@@ -0,0 +1,46 @@
+"""
+Сводка бюджета: из БД (BudgetDAO) и из таблицы (app.bot.table) суммы
+складываются в целых копейках.
+"""
+import asyncio
+
+from app.api.exporter import XlsxStreamWriter
+from app.bot.budget import format_budget_summary, summary_from_budget
+from app.bot.table import fetch_budget_info, read_budget
+
+
+def test_summary_from_budget():
+    summary = summary_from_budget({'events': [
+        {'title': 'Свадьба', 'total': 1500050, 'paid': 500000},
+        {'title': 'Корпоратив', 'total': 10, 'paid': 0},
+    ]})
+    assert (summary.total, summary.paid) == (15000.6, 5000.0)
+    assert [line.title for line in summary.lines] == ['Свадьба', 'Корпоратив']
+
+
+def test_read_budget_csv(tmp_path):
+    path = tmp_path / 'budget.csv'
+    path.write_text(
+        'Статья,Комментарий,Итого,Предоплата\n'
+        'Зал,,"1 500,50",500\n'
+        'Ведущий,,0.1,0.2\n'
+        ',,,\n'
+        'Цветы,,договорная,\n',
+        encoding='utf-8'
+    )
+    summary = read_budget(str(path))
+    assert (summary.total, summary.paid) == (1500.6, 500.2)
+    assert [line.title for line in summary.lines] == ['Зал', 'Ведущий', 'Цветы']
+    assert format_budget_summary(summary, 'Бюджет по таблице').startswith('Бюджет по таблице: 1501 руб.')
+
+
+def test_fetch_budget_info_xlsx(tmp_path):
+    path = tmp_path / 'budget.xlsx'
+    writer = XlsxStreamWriter('Лист1')
+    path.write_bytes(
+        writer.write_rows([('Статья', 'Итого', 'Предоплата'), ('Зал', 1500.5, 500), ('Ведущий', 99.99, None)])
+        + writer.close()
+    )
+
+    summary = asyncio.run(fetch_budget_info('test', source=lambda key: str(path)))
+    assert (summary.total, summary.paid) == (1600.49, 500.0)
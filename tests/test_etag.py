@@ -0,0 +1,103 @@
+"""
+ETag коллекций API (not_modified): 304 на совпадающий If-None-Match,
+новая метка после любого изменения набора и независимые метки у разных владельцев.
+"""
+from contextlib import asynccontextmanager
+from itertools import count
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.dao import ContractorCategoryDAO, UserDAO
+from app.api.router import router
+
+TELEGRAM_IDS = count(4001)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Соединения и писатель привязаны к циклу событий клиента
+    from app.database.db import engine, read_engine, stream_engine
+    from app.database.writer import write_queue
+
+    await write_queue.stop()
+    await engine.dispose()
+    await read_engine.dispose()
+    await stream_engine.dispose()
+
+
+@pytest.fixture
+def api(database):
+    """Клиент API и два владельца с категорией подрядчиков у каждого."""
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(router)
+
+    async def owners():
+        result = []
+        for _ in range(2):
+            user = await UserDAO.add(telegram_id=next(TELEGRAM_IDS), name='test')
+            category = await ContractorCategoryDAO.add(owner_id=user.id, title='Кейтеринг')
+            result.append((user.id, category.id))
+        return result
+
+    with TestClient(app) as client:
+        yield client, client.portal.call(owners)
+
+
+def add_contractor(client, owner_id: int, category_id: int, name: str) -> int:
+    response = client.post('/api/contractors', json={
+        'name': name, 'category_id': category_id, 'contact': '+7 900 000 00 00', 'owner_id': owner_id
+    })
+    assert response.status_code == 200
+    return response.json()['id']
+
+
+def etag(client, owner_id: int) -> str:
+    response = client.get('/api/contractors', params={'owner_id': owner_id})
+    assert response.status_code == 200
+    return response.headers['etag']
+
+
+def test_etag_changes_with_collection(api):
+    client, [(owner_id, category_id), _] = api
+    first_id = add_contractor(client, owner_id, category_id, 'Первый')
+    tag = etag(client, owner_id)
+
+    response = client.get('/api/contractors', params={'owner_id': owner_id}, headers={'If-None-Match': tag})
+    assert response.status_code == 304
+    assert response.headers['etag'] == tag
+    assert response.content == b''
+
+    tags = [tag]
+    add_contractor(client, owner_id, category_id, 'Второй')
+    tags.append(etag(client, owner_id))
+    # Изменение не последней записи: число записей и максимальный id прежние, меняется версия
+    assert client.put(f'/api/contractors/{first_id}', json={'contact': 'new'}).status_code == 200
+    tags.append(etag(client, owner_id))
+    assert client.delete(f'/api/contractors/{first_id}').status_code == 200
+    tags.append(etag(client, owner_id))
+    assert len(set(tags)) == 4
+
+    # Устаревшая метка больше не даёт 304
+    response = client.get('/api/contractors', params={'owner_id': owner_id}, headers={'If-None-Match': tag})
+    assert response.status_code == 200
+    assert [item['name'] for item in response.json()] == ['Второй']
+
+
+def test_etag_is_per_owner(api):
+    client, [(owner_id, category_id), (other_id, other_category_id)] = api
+    add_contractor(client, owner_id, category_id, 'Свой')
+    add_contractor(client, other_id, other_category_id, 'Чужой')
+    tag, other_tag = etag(client, owner_id), etag(client, other_id)
+    assert tag != other_tag
+
+    # Метка одного владельца не подходит к коллекции другого
+    response = client.get('/api/contractors', params={'owner_id': other_id}, headers={'If-None-Match': tag})
+    assert response.status_code == 200
+
+    # Изменения у другого владельца не сбрасывают метку
+    add_contractor(client, other_id, other_category_id, 'Чужой 2')
+    assert etag(client, owner_id) == tag
+    assert etag(client, other_id) != other_tag
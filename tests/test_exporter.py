@@ -0,0 +1,60 @@
+"""
+Выгрузка в CSV/XLSX: текст, похожий на формулу, не должен выполняться
+табличным редактором (CSV/formula injection).
+"""
+import csv
+import io
+import zipfile
+
+import pytest
+
+from app.api.dao import ContractorCategoryDAO, ContractorDAO, UserDAO
+from app.api.exporter import XlsxStreamWriter, _csv_chunk, export_rows
+from app.api.importer import _text
+from app.utils.xlsx import XlsxRowReader
+
+DANGEROUS = ['=HYPERLINK("http://example.com")', '+7 900 000 00 00', '-2+3', '@SUM(A1)', '\tcmd', '\rcmd']
+
+
+def _read_xlsx(data: bytes) -> list[dict]:
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        return list(XlsxRowReader(archive))
+
+
+@pytest.mark.parametrize('value', DANGEROUS)
+def test_csv_escapes_formulas(value):
+    row, = csv.reader(io.StringIO(_csv_chunk([(value, 'Кейтеринг', -5, 12)]).decode('utf-8')))
+    assert row == ["'" + value, 'Кейтеринг', '-5', '12']
+
+
+@pytest.mark.parametrize('value', DANGEROUS)
+def test_xlsx_escapes_formulas(value):
+    writer = XlsxStreamWriter('test')
+    data = writer.write_rows([(value, 'Кейтеринг', -5)]) + writer.close()
+    row, = _read_xlsx(data)
+    # XML-парсер приводит \r к \n
+    assert row == {0: "'" + value.replace('\r', '\n'), 1: 'Кейтеринг', 2: '-5'}
+
+
+@pytest.mark.parametrize('value', DANGEROUS)
+def test_import_restores_escaped_text(value):
+    assert _text("'" + value, 'Название', 200) == value.strip()
+
+
+@pytest.mark.parametrize('telegram_id, file_format', [(2001, 'csv'), (2002, 'xlsx')])
+def test_export_escapes_user_text(telegram_id, file_format, run, database):
+    async def main():
+        user = await UserDAO.add(telegram_id=telegram_id, name='test')
+        category = await ContractorCategoryDAO.add(owner_id=user.id, title='@Кейтеринг')
+        await ContractorDAO.add(owner_id=user.id, category_id=category.id,
+                                name='=1+1', contact='+7 900 000 00 00')
+        return b''.join([chunk async for chunk in export_rows('contractors', user.id, file_format)])
+
+    data = run(main())
+    if file_format == 'csv':
+        _, row = csv.reader(io.StringIO(data.decode('utf-8-sig')))
+        values = row[1:]
+    else:
+        _, row = _read_xlsx(data)
+        values = [row[index] for index in (1, 2, 3)]
+    assert values == ["'=1+1", "'@Кейтеринг", "'+7 900 000 00 00"]
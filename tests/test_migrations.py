@@ -0,0 +1,82 @@
+"""
+Миграция d3a7c6b1e925: строковые стоимости переводятся в копейки,
+неразборчивые становятся NULL.
+"""
+import importlib.util
+import os
+
+import pytest
+
+MIGRATION = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'app', 'migrations', 'versions', 'd3a7c6b1e925_event_contractors_numeric_cost.py'
+)
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location('migration_d3a7c6b1e925', MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    return migration
+
+
+@pytest.fixture(scope='module')
+def parse_amount():
+    return load_migration()._parse_amount
+
+
+@pytest.mark.parametrize('value, kopecks', [
+    ('1 000,50', 100050),
+    ('1000.5', 100050),
+    ('₽ 200', 20000),
+    ('15 000 руб.', 1500000),
+    ('1.500.000', 150000000),
+    ('1\xa0500,5 ₽', 150050),
+    ('5к', 500000),
+    ('1,5 млн', 150000000),
+    ('0', 0),
+])
+def test_parse_amount(parse_amount, value, kopecks):
+    assert parse_amount(value) == kopecks
+
+
+@pytest.mark.parametrize('value', [
+    '',
+    '   ',
+    'договорная',
+    'abc123xyz',
+    'от 10000 до 15000',
+    '12.5.2024',
+    '1.500.50',
+    '₽',
+    None,
+])
+def test_unparseable_amount_is_null(parse_amount, value):
+    assert parse_amount(value) is None
+
+
+def test_upgrade_converts_costs(tmp_path):
+    import sqlalchemy as sa
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+
+    migration = load_migration()
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    with engine.begin() as connection:
+        connection.execute(sa.text(
+            'CREATE TABLE event_contractors (event_id INTEGER NOT NULL, contractor_id INTEGER NOT NULL, '
+            'cost VARCHAR, PRIMARY KEY (event_id, contractor_id))'
+        ))
+        connection.execute(
+            sa.text('INSERT INTO event_contractors VALUES (1, :contractor_id, :cost)'),
+            [{'contractor_id': 1, 'cost': '1 000,50'}, {'contractor_id': 2, 'cost': 'договорная'},
+             {'contractor_id': 3, 'cost': ''}, {'contractor_id': 4, 'cost': None}]
+        )
+        migration.op = Operations(MigrationContext.configure(connection))
+        migration.upgrade()
+        rows = connection.execute(sa.text(
+            'SELECT contractor_id, cost, typeof(cost), paid FROM event_contractors ORDER BY contractor_id'
+        )).all()
+    engine.dispose()
+
+    assert rows == [(1, 100050, 'integer', 0), (2, None, 'null', 0), (3, None, 'null', 0), (4, None, 'null', 0)]
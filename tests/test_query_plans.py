@@ -0,0 +1,191 @@
+"""
+Планы запросов DAO: ни один горячий запрос не должен читать таблицу целиком.
+
+Каждый вызов DAO выполняется на временной БД, его SQL перехватывается
+и прогоняется через EXPLAIN QUERY PLAN. Тест падает, если в плане есть
+полный просмотр таблицы (SCAN) или не используется ожидаемый индекс
+из миграции 4b9e2f7c1a3d.
+"""
+import datetime
+import importlib.util
+import os
+import sqlite3
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.api.dao import (
+    BudgetDAO,
+    ChecklistDAO,
+    ChecklistItemDAO,
+    ContractorCategoryDAO,
+    ContractorDAO,
+    EventDAO,
+    ExportDAO,
+    TaskDAO,
+    UserDAO,
+)
+from app.database.db import Base, engine, read_engine, stream_engine
+from app.database.models import CompletedChecklistItem, EventChecklist, Task
+from app.database.writer import write_scope
+
+MIGRATION = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'app', 'migrations', 'versions', '4b9e2f7c1a3d_indexes.py'
+)
+# Служебные команды, у которых нет плана
+SKIPPED_PREFIXES = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'PRAGMA')
+
+
+@contextmanager
+def captured_statements():
+    """Собирает (SQL, параметры) всех запросов к БД внутри блока."""
+    statements = []
+
+    def listener(connection, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(SKIPPED_PREFIXES):
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+    engines = (engine.sync_engine, read_engine.sync_engine, stream_engine.sync_engine)
+    for target in engines:
+        event.listen(target, 'before_cursor_execute', listener)
+    try:
+        yield statements
+    finally:
+        for target in engines:
+            event.remove(target, 'before_cursor_execute', listener)
+
+
+def query_plan(path, statement: str, parameters) -> list[str]:
+    connection = sqlite3.connect(path)
+    try:
+        rows = connection.execute(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+    finally:
+        connection.close()
+    return [row[3] for row in rows]
+
+
+@pytest.fixture(scope='module')
+def data(run, database):
+    """Заполняет БД небольшим набором связанных записей; возвращает их ID."""
+
+    async def fill():
+        user = await UserDAO.add(telegram_id=1, name='test')
+        category = await ContractorCategoryDAO.add(owner_id=user.id, title='Кейтеринг')
+        contractor = await ContractorDAO.add(owner_id=user.id, category_id=category.id,
+                                             name='Подрядчик', contact='+7 900 000 00 00')
+        event_ = await EventDAO.add(owner_id=user.id, title='Мероприятие', date=datetime.date(2024, 1, 1))
+        await EventDAO.assign_contractor(event_.id, contractor.id, cost=1000000, paid=50000)
+        checklist = await ChecklistDAO.add(owner_id=user.id, title='Чек-лист')
+        item = await ChecklistItemDAO.add(checklist_id=checklist.id, title='Пункт')
+        async with write_scope() as session:
+            session.add(Task(event_id=event_.id, title='Задача', date=datetime.date(2024, 1, 1)))
+            session.add(EventChecklist(event_id=event_.id, checklist_id=checklist.id))
+            session.add(CompletedChecklistItem(event_id=event_.id, item_id=item.id, completed_by=user.id))
+        return {'owner': user.id, 'category': category.id, 'event': event_.id,
+                'checklist': checklist.id, 'item': item.id, 'telegram': user.telegram_id}
+
+    return run(fill())
+
+
+async def _export(kind: str, owner_id: int) -> None:
+    async for _ in ExportDAO.stream(kind, owner_id):
+        pass
+
+
+# Вызов DAO -> индексы, которые его план обязан использовать
+CASES = {
+    'EventDAO.get_events_by_user': (
+        lambda ids: EventDAO.get_events_by_user(ids['owner']), ['ix_events_owner_id_date']),
+    'EventDAO.find_all': (
+        lambda ids: EventDAO.find_all(owner_id=ids['owner']), ['ix_events_owner_id_date']),
+    'EventDAO.find_page': (
+        lambda ids: EventDAO.find_page(50, owner_id=ids['owner']), []),
+    'EventDAO.get_version': (
+        lambda ids: EventDAO.get_version(owner_id=ids['owner']), ['ix_events_owner_id_date']),
+    'EventDAO.get_event_with_details': (
+        lambda ids: EventDAO.get_event_with_details(ids['event']), ['ix_tasks_event_id_date']),
+    'UserDAO.find_one_with_events': (
+        lambda ids: UserDAO.find_one_with_events(ids['telegram']), ['ix_events_owner_id_date']),
+    'BudgetDAO.get_owner_budget': (
+        lambda ids: BudgetDAO.get_owner_budget(ids['owner']), ['ix_events_owner_id_date']),
+    'BudgetDAO.get_event_budget': (
+        lambda ids: BudgetDAO.get_event_budget(ids['event']), []),
+    'ContractorDAO.get_contractors_by_user': (
+        lambda ids: ContractorDAO.get_contractors_by_user(ids['owner']), ['ix_contractors_owner_id_name']),
+    'ContractorDAO.find_all by category': (
+        lambda ids: ContractorDAO.find_all(owner_id=ids['owner'], category_id=ids['category']),
+        ['ix_contractors_category_id']),
+    'ContractorDAO.get_version': (
+        lambda ids: ContractorDAO.get_version(owner_id=ids['owner']), ['ix_contractors_owner_id_name']),
+    'ContractorDAO.get_categories_by_user': (
+        lambda ids: ContractorDAO.get_categories_by_user(ids['owner']), ['ix_contractor_categories_owner_id']),
+    'ContractorDAO.get_contractors_for_event': (
+        lambda ids: ContractorDAO.get_contractors_for_event(ids['event']), []),
+    'ContractorCategoryDAO.find_all': (
+        lambda ids: ContractorCategoryDAO.find_all(owner_id=ids['owner']), ['ix_contractor_categories_owner_id']),
+    'TaskDAO.get_tasks_for_event': (
+        lambda ids: TaskDAO.get_tasks_for_event(ids['event']), ['ix_tasks_event_id_date']),
+    'ChecklistDAO.find_all': (
+        lambda ids: ChecklistDAO.find_all(owner_id=ids['owner']), ['ix_checklists_owner_id']),
+    'ChecklistDAO.get_checklists_for_event': (
+        lambda ids: ChecklistDAO.get_checklists_for_event(ids['event']), []),
+    'ChecklistItemDAO.load_many_by': (
+        lambda ids: ChecklistItemDAO.load_many_by('checklist_id', [ids['checklist']]),
+        ['ix_checklist_items_checklist_id']),
+    'ChecklistItemDAO.get_completed_items_for_event': (
+        lambda ids: ChecklistItemDAO.get_completed_items_for_event(ids['event']), []),
+    'ExportDAO events': (
+        lambda ids: _export('events', ids['owner']), ['ix_events_owner_id_date']),
+    'ExportDAO contractors': (
+        lambda ids: _export('contractors', ids['owner']), ['ix_contractors_owner_id_name']),
+    'ExportDAO tasks': (
+        lambda ids: _export('tasks', ids['owner']), ['ix_events_owner_id_date', 'ix_tasks_event_id_date']),
+    'ExportDAO budget': (
+        lambda ids: _export('budget', ids['owner']), ['ix_events_owner_id_date']),
+}
+
+
+@pytest.mark.parametrize('name', list(CASES))
+def test_query_uses_indexes(name, run, database, data):
+    call, indexes = CASES[name]
+    with captured_statements() as statements:
+        run(call(data))
+    assert statements, f'{name} не выполнил ни одного запроса'
+
+    plans = [(statement, query_plan(database, statement, parameters)) for statement, parameters in statements]
+    for statement, plan in plans:
+        scans = [line for line in plan if line.startswith('SCAN ') and line != 'SCAN CONSTANT ROW']
+        assert not scans, f'{name}: полный просмотр таблицы {scans}\n{statement}'
+
+    details = [line for _, plan in plans for line in plan]
+    for index in indexes:
+        assert any(
+            f'USING INDEX {index}' in line or f'USING COVERING INDEX {index}' in line for line in details
+        ), f'{name}: индекс {index} не используется\n' + '\n'.join(details)
+
+
+def test_model_indexes_match_migration():
+    """Схема тестов строится по моделям, поэтому их индексы должны совпадать с созданными миграцией."""
+
+    class Recorder:
+        def __init__(self):
+            self.indexes = {}
+
+        def create_index(self, name, table, columns, **kwargs):
+            self.indexes[name] = (table, tuple(columns))
+
+    spec = importlib.util.spec_from_file_location('migration_4b9e2f7c1a3d', MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    migration.op = Recorder()
+    migration.upgrade()
+
+    models = {
+        index.name: (table.name, tuple(column.name for column in index.columns))
+        for table in Base.metadata.tables.values()
+        for index in table.indexes
+    }
+    for name, definition in migration.op.indexes.items():
+        assert models.get(name) == definition, f'индекс {name} из миграции не совпадает с моделями'
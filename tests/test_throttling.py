@@ -0,0 +1,137 @@
+"""
+Ограничение нагрузки бота (ThrottlingMiddleware): ведро токенов на пользователя
+и отклонение нажатий кнопок, когда заняты все слоты обработки.
+"""
+import asyncio
+
+import pytest
+from aiogram.exceptions import TelegramNetworkError
+from aiogram.methods import AnswerCallbackQuery
+from aiogram.types import CallbackQuery, Message, Update, User
+
+import app.bot.middlewares as middlewares
+from app.bot.middlewares import ThrottlingMiddleware
+
+USER = User(id=1, is_bot=False, first_name='Test')
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class FakeBot:
+    def __init__(self, error: Exception = None):
+        self.answers = []
+        self.error = error
+
+    async def answer_callback_query(self, callback_query_id: str, text: str) -> None:
+        if self.error is not None:
+            raise self.error
+        self.answers.append((callback_query_id, text))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(middlewares, 'time', clock)
+    return clock
+
+
+def callback_update(update_id: int) -> Update:
+    return Update(update_id=update_id, callback_query=CallbackQuery(
+        id=str(update_id), from_user=USER, chat_instance='test', data='budget_menu'
+    ))
+
+
+def message_update(update_id: int) -> Update:
+    return Update(update_id=update_id, message=Message.model_validate({
+        'message_id': update_id, 'date': 0, 'chat': {'id': 1, 'type': 'private'}, 'from': USER.model_dump()
+    }))
+
+
+async def handled(event, data):
+    return 'handled'
+
+
+def test_bucket_allows_burst_then_drops(clock):
+    throttling = ThrottlingMiddleware(rate=1.0, burst=3)
+    assert [throttling._allow(USER.id) for _ in range(4)] == [True, True, True, False]
+    # Другой пользователь не делит ведро
+    assert throttling._allow(2)
+
+
+def test_bucket_refills_at_rate(clock):
+    throttling = ThrottlingMiddleware(rate=2.0, burst=3)
+    for _ in range(3):
+        assert throttling._allow(USER.id)
+    assert not throttling._allow(USER.id)
+
+    clock.now += 0.5
+    assert throttling._allow(USER.id)
+    assert not throttling._allow(USER.id)
+
+    # Ведро пополняется не выше burst
+    clock.now += 60
+    assert [throttling._allow(USER.id) for _ in range(4)] == [True, True, True, False]
+
+
+def test_idle_buckets_expire(clock):
+    throttling = ThrottlingMiddleware(rate=1.0, burst=5)
+    throttling._allow(USER.id)
+    clock.now += 10
+    throttling._allow(2)
+    assert list(throttling._buckets) == [2]
+
+
+def test_throttled_callback_is_answered(clock):
+    throttling = ThrottlingMiddleware(rate=1.0, burst=1)
+    bot = FakeBot()
+    data = {'event_from_user': USER, 'bot': bot}
+
+    async def main():
+        return [await throttling(handled, callback_update(update_id), data) for update_id in (1, 2)]
+
+    assert asyncio.run(main()) == ['handled', None]
+    assert throttling.throttled == 1
+    assert bot.answers == [('2', 'Слишком часто, подождите немного')]
+
+
+def test_shed_callback_is_answered_and_message_waits(clock):
+    throttling = ThrottlingMiddleware(rate=100.0, burst=100, max_concurrency=1)
+    bot = FakeBot()
+    data = {'event_from_user': USER, 'bot': bot}
+
+    async def main():
+        release = asyncio.Event()
+
+        async def slow(event, data):
+            await release.wait()
+            return 'slow'
+
+        busy = asyncio.create_task(throttling(slow, message_update(1), data))
+        await asyncio.sleep(0)
+        shed = await throttling(handled, callback_update(2), data)
+        waiting = asyncio.create_task(throttling(handled, message_update(3), data))
+        await asyncio.sleep(0)
+        assert not waiting.done()
+        release.set()
+        return shed, await busy, await waiting
+
+    assert asyncio.run(main()) == (None, 'slow', 'handled')
+    assert throttling.shed == 1
+    assert bot.answers == [('2', 'Бот перегружен, попробуйте ещё раз')]
+
+
+def test_failed_answer_does_not_raise(clock):
+    throttling = ThrottlingMiddleware(rate=1.0, burst=1)
+    error = TelegramNetworkError(method=AnswerCallbackQuery(callback_query_id='2'), message='timeout')
+    data = {'event_from_user': USER, 'bot': FakeBot(error)}
+
+    async def main():
+        return [await throttling(handled, callback_update(update_id), data) for update_id in (1, 2)]
+
+    assert asyncio.run(main()) == ['handled', None]
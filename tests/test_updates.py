@@ -0,0 +1,138 @@
+"""
+Приём апдейтов вебхуком: дедупликация повторных доставок (UpdateDeduplicator)
+и ограниченная очередь (UpdateQueue).
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.bot.updates import UpdateDeduplicator, UpdateQueue
+from app.config import settings
+
+
+def is_duplicate(dedup: UpdateDeduplicator, update_id: int) -> bool:
+    return asyncio.run(dedup.is_duplicate(update_id))
+
+
+def test_duplicate_inside_window_is_rejected():
+    dedup = UpdateDeduplicator(window=100)
+    assert not is_duplicate(dedup, 10)
+    assert not is_duplicate(dedup, 12)
+    # Апдейт младше наибольшего, но внутри окна
+    assert not is_duplicate(dedup, 11)
+
+    assert is_duplicate(dedup, 10)
+    assert is_duplicate(dedup, 11)
+    assert is_duplicate(dedup, 12)
+    assert dedup.duplicates == 3
+
+
+def test_window_slides_past_old_ids():
+    dedup = UpdateDeduplicator(window=8)
+    for update_id in range(1, 6):
+        assert not is_duplicate(dedup, update_id)
+
+    # Сдвиг на часть окна: ID 1 и 9 делят бит, отметка ID 1 должна быть снята
+    assert not is_duplicate(dedup, 9)
+    assert is_duplicate(dedup, 5)
+    assert not is_duplicate(dedup, 1)  # вышел из окна и снова считается новым
+    assert is_duplicate(dedup, 9)
+
+    # Сдвиг далеко за окно сбрасывает все отметки
+    assert not is_duplicate(dedup, 1_000_000)
+    assert not is_duplicate(dedup, 999_999)
+    assert not is_duplicate(dedup, 5)
+    assert is_duplicate(dedup, 1_000_000)
+    assert is_duplicate(dedup, 999_999)
+
+
+def test_released_update_is_accepted_again():
+    dedup = UpdateDeduplicator(window=100)
+    assert not is_duplicate(dedup, 7)
+    asyncio.run(dedup.release(7))
+    assert not is_duplicate(dedup, 7)
+
+
+def test_window_must_be_positive():
+    with pytest.raises(ValueError):
+        UpdateDeduplicator(window=0)
+
+
+def test_shared_mode_claims_updates_in_database(run, database):
+    # Два процесса с общей БД: у каждого своё окно в памяти
+    first = UpdateDeduplicator(window=100, shared=True)
+    second = UpdateDeduplicator(window=100, shared=True)
+
+    async def main():
+        results = [await first.is_duplicate(500), await second.is_duplicate(500)]
+        # Владелец снимает отметку, и повторную доставку принимает другой процесс
+        await first.release(500)
+        results.append(await second.is_duplicate(500))
+        results.append(await first.is_duplicate(500))
+        return results
+
+    assert run(main()) == [False, True, False, True]
+    assert (first.duplicates, second.duplicates) == (1, 1)
+
+
+def test_shared_mode_keeps_only_the_window(run, database):
+    from app.api.dao import ProcessedUpdateDAO
+
+    dedup = UpdateDeduplicator(window=10, shared=True)
+
+    async def main():
+        for update_id in range(1000, 1025):
+            assert not await dedup.is_duplicate(update_id)
+        return sorted(row.update_id for row in await ProcessedUpdateDAO.find_all()
+                      if 1000 <= row.update_id < 1025)
+
+    assert run(main()) == list(range(1015, 1025))
+
+
+@pytest.fixture
+def webhook(monkeypatch):
+    """Клиент вебхука с очередью на один апдейт, которую никто не разбирает."""
+    import app.main
+
+    queue = UpdateQueue(app.main.dp, app.main.bot, workers=1, maxsize=1)
+    queue._queues.append(asyncio.Queue())
+    dedup = UpdateDeduplicator(window=100)
+    monkeypatch.setattr(app.main, 'update_queue', queue)
+    monkeypatch.setattr(app.main, 'update_dedup', dedup)
+    # Без with: lifespan (вебхук в Telegram) не запускается
+    client = TestClient(app.main.app, headers={'X-Telegram-Bot-Api-Secret-Token': settings.get_webhook_secret()})
+    return client, queue, dedup
+
+
+def test_full_queue_returns_429(webhook):
+    client, queue, dedup = webhook
+
+    assert client.post('/webhook', json={'update_id': 1}).status_code == 200
+    response = client.post('/webhook', json={'update_id': 2})
+    assert response.status_code == 429
+    assert queue.stats()['rejected'] == 1
+
+    # Отклонённый апдейт не запоминается: Telegram повторит доставку, и она будет принята
+    queue._queues[0].get_nowait()
+    queue._depth = 0
+    assert client.post('/webhook', json={'update_id': 2}).status_code == 200
+    # Повтор принятого апдейта подтверждается без постановки в очередь
+    assert client.post('/webhook', json={'update_id': 2}).status_code == 200
+    assert dedup.duplicates == 1
+    assert queue.stats()['depth'] == 1
+
+
+def test_webhook_requires_secret(webhook):
+    client, queue, _ = webhook
+    wrong = {'X-Telegram-Bot-Api-Secret-Token': 'wrong'}
+
+    assert client.post('/webhook', json={'update_id': 3}, headers=wrong).status_code == 403
+    assert client.get('/webhook/stats', headers=wrong).status_code == 403
+    assert client.get('/webhook/stats', headers={'X-Telegram-Bot-Api-Secret-Token': ''}).status_code == 403
+
+    response = client.get('/webhook/stats')
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats['depth'] == 0
+    assert set(stats['cache']['users']) == {'size', 'hits', 'misses', 'evictions'}
@@ -0,0 +1,46 @@
+"""
+BaseDAO.upsert: признак created ставится только для действительно вставленной записи.
+"""
+import asyncio
+from datetime import datetime
+
+import app.api.base
+from app.api.dao import UserDAO
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime(2024, 1, 1, tzinfo=tz)
+
+
+def test_concurrent_upserts_create_once(run, database, monkeypatch):
+    # Одинаковые метки времени у параллельных запросов не должны давать лишних created
+    monkeypatch.setattr(app.api.base, 'datetime', FrozenDatetime)
+
+    async def main():
+        return await asyncio.gather(*(
+            UserDAO.upsert(('telegram_id',), telegram_id=3001, name=f'user {index}')
+            for index in range(10)
+        ))
+
+    results = run(main())
+    assert [created for _, created in results].count(True) == 1
+    assert len({user.id for user, _ in results}) == 1
+
+
+def test_upsert_updates_existing_record(run, database):
+    async def main():
+        first, first_created = await UserDAO.upsert(('telegram_id',), telegram_id=3002, name='old')
+        second, second_created = await UserDAO.upsert(
+            ('telegram_id',), telegram_id=3002, name='new', username='new_username'
+        )
+        stored = await UserDAO.find_one_or_none(telegram_id=3002)
+        return first, first_created, second, second_created, stored
+
+    first, first_created, second, second_created, stored = run(main())
+    assert (first_created, second_created) == (True, False)
+    assert second.id == first.id == stored.id
+    assert (stored.name, stored.username) == ('new', 'new_username')
+    assert stored.created_at == first.created_at
+    assert stored.version > first.version
@@ -0,0 +1,95 @@
+"""
+Очередь записи и единицы работы: заявка писателя держится только на время
+блока записи, а не всего запроса или апдейта.
+"""
+import asyncio
+import datetime
+import sqlite3
+import time
+
+import pytest
+
+from app.api.dao import EventDAO, UserDAO
+from app.database.db import unit_of_work
+from app.database.writer import after_commit, write_queue, write_scope
+
+# Ожидание сети (например, ответ в Telegram) между изменениями в одной единице работы
+SLOW_STEP = 0.3
+
+
+def test_slow_units_of_work_do_not_serialize(run, database):
+    async def handler(telegram_id: int) -> None:
+        async with unit_of_work():
+            user = await UserDAO.add(telegram_id=telegram_id, name='first')
+            await asyncio.sleep(SLOW_STEP)
+            await UserDAO.update(id=user.id, name='second')
+
+    async def main():
+        started = time.perf_counter()
+        await asyncio.gather(handler(1001), handler(1002))
+        return time.perf_counter() - started
+
+    # По очереди две единицы работы заняли бы не меньше 2 * SLOW_STEP
+    assert run(main()) < 1.5 * SLOW_STEP
+
+
+def test_write_lock_released_between_writes(run, database):
+    async def main():
+        async with unit_of_work():
+            await UserDAO.add(telegram_id=1003, name='test')
+            # Пока обработчик ждёт, другой процесс может писать без ожидания блокировки
+            connection = sqlite3.connect(database, timeout=0)
+            try:
+                connection.execute('BEGIN IMMEDIATE')
+                connection.rollback()
+            finally:
+                connection.close()
+
+    run(main())
+
+
+def test_unit_of_work_reads_its_own_writes(run, database):
+    async def main():
+        async with unit_of_work():
+            user = await UserDAO.add(telegram_id=1004, name='test')
+            event = await EventDAO.add(owner_id=user.id, title='old', date=datetime.date(2024, 1, 1))
+            assert (await EventDAO.find_one_or_none_by_id(event.id)).title == 'old'
+            await EventDAO.update(id=event.id, title='new')
+            return (await EventDAO.find_one_or_none_by_id(event.id)).title
+
+    assert run(main()) == 'new'
+
+
+def test_failed_block_does_not_undo_committed_ones(run, database):
+    async def main():
+        async with unit_of_work():
+            user = await UserDAO.add(telegram_id=1005, name='test')
+            with pytest.raises(Exception):
+                # telegram_id уникален
+                await UserDAO.add(telegram_id=1005, name='duplicate')
+            return await UserDAO.find_one_or_none_by_id(user.id)
+
+    assert run(main()).name == 'test'
+
+
+def test_after_commit_waits_for_outer_block(run, database):
+    calls = []
+
+    async def main():
+        async with write_scope():
+            await UserDAO.add(telegram_id=1006, name='test')
+            after_commit(lambda: calls.append('committed'))
+            assert calls == []
+        assert calls == ['committed']
+
+    run(main())
+
+
+def test_nested_transaction_is_rejected(run, database):
+    async def main():
+        async with write_scope():
+            with pytest.raises(RuntimeError):
+                async with write_queue.transaction():
+                    pass
+
+    run(main())